@@ -6,6 +6,21 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     db_name: str
     db_uri: str
+    db_max_pool_size: int = 100
+    db_min_pool_size: int = 0
+    db_server_selection_timeout_ms: int = 5000
+    db_connect_timeout_ms: int = 10000
+    db_socket_timeout_ms: int = 20000
+
+    match_history_page_size: int = 20
+    match_history_max_page_size: int = 100
+
+    user_cache_size: int = 1024
+    user_cache_ttl_seconds: float = 60
+
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_queue_size: int = 32
 
     smtp_server: str
     smtp_port: str
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from crud.user_crud import user_cache
+from dependencies.internal import is_internal
 from schemas.user_schema import UserRegister, UserLogin
 from schemas.otp_schema import OTPVerify
 from service import auth_service, otp_service
@@ -8,14 +10,14 @@ router = APIRouter()
 
 
 @router.post("/register")
-def register(user: UserRegister):
-    otp = auth_service.initiate_signup(user)
+async def register(user: UserRegister):
+    await auth_service.initiate_signup(user)
     return {"message": "OTP sent to your email"}
 
 
 @router.post("/verify-otp")
 async def verify_otp(data: OTPVerify):
-    if otp_service.verify_otp(data):
+    if await otp_service.verify_otp(data):
         return {"message": "User registered successfully"}
     raise HTTPException(status_code=400, detail="Invalid OTP")
 
@@ -25,6 +27,13 @@ async def verify_otp(data: OTPVerify):
     403: {"description": "User not verified"},
     404: {"description": "User not found"}
 })
-def login(user: UserLogin):
-    token = auth_service.login_user(user)
+async def login(user: UserLogin):
+    token = await auth_service.login_user(user)
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.get("/user-cache", responses={
+    401: {"description": "Unauthorized Access"}
+})
+async def user_cache_stats(auth=Depends(is_internal)):
+    return user_cache.stats()
@@ -1,22 +1,27 @@
 from bson import ObjectId
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from pymongo import DESCENDING
 from database import database
 from schemas.match_schema import MatchCreate, Match, MATCH_STATUS
 from datetime import datetime
 
 match_collection = database.get_collection("matches")
 
+# Newest first, _id breaks ties between matches of the same date
+MATCH_PAGE_SORT = [("date", DESCENDING), ("_id", DESCENDING)]
+MATCH_PAGE_PROJECTION = {"date": 1, "status": 1, "video_url": 1}
 
-def create_match(data: MatchCreate) -> str:
+
+async def create_match(data: MatchCreate) -> str:
     match_dict = data.model_dump()
     match_dict["date"] = match_dict.get("date", datetime.now())
     match_dict["status"] = "pending"
-    result = match_collection.insert_one(match_dict)
+    result = await match_collection.insert_one(match_dict)
     return str(result.inserted_id)
 
 
-def find_match_by(filters: Dict[str, Any]) -> Optional[Match]:
-    match_doc = match_collection.find_one(filters)
+async def find_match_by(filters: Dict[str, Any]) -> Optional[Match]:
+    match_doc = await match_collection.find_one(filters)
     if match_doc:
         return Match(
             id=match_doc["_id"],
@@ -31,15 +36,15 @@ def find_match_by(filters: Dict[str, Any]) -> Optional[Match]:
     return None
 
 
-def update_match_by(filters: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
-    result = match_collection.update_one(filters, {"$set": update_data})
+async def update_match_by(filters: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
+    result = await match_collection.update_one(filters, {"$set": update_data})
     return result.modified_count > 0
 
 
-def find_all_match_by(filters: Dict[str, Any]) -> List[Match]:
+async def find_all_match_by(filters: Dict[str, Any]) -> List[Match]:
     matches_docs = match_collection.find(filters)
     matches = []
-    for match_doc in matches_docs:
+    async for match_doc in matches_docs:
         match = Match(
             id=match_doc["_id"],
             date=match_doc["date"],
@@ -54,21 +59,38 @@ def find_all_match_by(filters: Dict[str, Any]) -> List[Match]:
     return matches
 
 
-def get_match_by_id(match_id: str) -> Optional[Match]:
-    return find_match_by({"_id": ObjectId(match_id)})
+async def get_match_by_id(match_id: str) -> Optional[Match]:
+    return await find_match_by({"_id": ObjectId(match_id)})
+
+
+# One page of raw match documents, limited to MATCH_PAGE_PROJECTION, in MATCH_PAGE_SORT order,
+# starting after the (date, _id) of the last match of the previous page
+async def find_match_page_by(
+    filters: Dict[str, Any], limit: int, after: Optional[Tuple[datetime, ObjectId]] = None
+) -> List[Dict[str, Any]]:
+    if after is not None:
+        date, match_id = after
+        filters = {
+            **filters,
+            "$or": [{"date": {"$lt": date}}, {"date": date, "_id": {"$lt": match_id}}],
+        }
+    cursor = match_collection.find(filters, MATCH_PAGE_PROJECTION).sort(MATCH_PAGE_SORT).limit(limit)
+    return await cursor.to_list(length=limit)
 
 
-def get_matches_by_user(user_id: str) -> List[Match]:
-    return find_all_match_by({"user_id": user_id})
+async def get_matches_by_user(
+    user_id: ObjectId, limit: int, after: Optional[Tuple[datetime, ObjectId]] = None
+) -> List[Dict[str, Any]]:
+    return await find_match_page_by({"user_id": user_id}, limit, after)
 
 
-def update_match_status(match_id: str, new_status: MATCH_STATUS) -> bool:
-    return update_match_by(
+async def update_match_status(match_id: str, new_status: MATCH_STATUS) -> bool:
+    return await update_match_by(
         {"_id": ObjectId(match_id)},
         {"status": new_status},
     )
 
 
-def delete_match(match_id: str) -> bool:
-    result = match_collection.delete_one({"_id": ObjectId(match_id)})
+async def delete_match(match_id: str) -> bool:
+    result = await match_collection.delete_one({"_id": ObjectId(match_id)})
     return result.deleted_count > 0
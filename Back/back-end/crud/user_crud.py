@@ -1,24 +1,31 @@
 from typing import Dict, Any, Optional
 import bson
+from config import get_settings
 from database import database
 from schemas.user_schema import User, NewUser
+from utils.cache import TTLCache
 
+settings = get_settings()
 user_collection = database.get_collection("users")
 
+# Users authenticated by is_auth, keyed by their id as a string. Every update through
+# update_user_by drops the matching entries, the TTL bounds how stale other workers can be
+user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
 
-def create_user(user_data: NewUser) -> bson.ObjectId:
+
+async def create_user(user_data: NewUser) -> bson.ObjectId:
     user_dict = {
         "email": user_data.email,
         "username": user_data.username,
         "password": user_data.password,
         "is_verified": False
     }
-    result = user_collection.insert_one(user_dict)
+    result = await user_collection.insert_one(user_dict)
     return result.inserted_id
 
 
-def find_user_by(filters: Dict[str, Any]) -> Optional[User]:
-    user_doc = user_collection.find_one(filters)
+async def find_user_by(filters: Dict[str, Any]) -> Optional[User]:
+    user_doc = await user_collection.find_one(filters)
     if user_doc:
         return User(
             id=user_doc["_id"],
@@ -30,22 +37,45 @@ def find_user_by(filters: Dict[str, Any]) -> Optional[User]:
     return None
 
 
-def update_user_by(filters: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
-    result = user_collection.update_one(filters, {"$set": update_data})
+def invalidate_cached_users(filters: Dict[str, Any]):
+    if "_id" in filters:
+        user_cache.invalidate(str(filters["_id"]))
+    else:
+        user_cache.invalidate_where(
+            lambda user: all(getattr(user, key, None) == value for key, value in filters.items())
+        )
+
+
+async def update_user_by(filters: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
+    result = await user_collection.update_one(filters, {"$set": update_data})
+    invalidate_cached_users(filters)
     return result.modified_count > 0
 
 
-def get_user_by_email(email: str) -> Optional[User]:
-    return find_user_by({"email": email})
+async def get_user_by_email(email: str) -> Optional[User]:
+    return await find_user_by({"email": email})
+
+
+async def get_user_by_id(user_id: str) -> Optional[User]:
+    return await find_user_by({"_id": bson.ObjectId(user_id)})
 
 
-def get_user_by_id(user_id: str) -> Optional[User]:
-    return find_user_by({"_id": bson.ObjectId(user_id)})
+async def get_cached_user_by_id(user_id: str) -> Optional[User]:
+    user = user_cache.get(user_id)
+    if user is None:
+        # An update landing while the user is read must not leave the old user cached
+        version = user_cache.version()
+        user = await get_user_by_id(user_id)
+        if user is None:
+            return None
+        user_cache.set(user_id, user, version)
+    # Callers get their own copy, the cached one stays as read from the database
+    return user.model_copy()
 
 
-def update_user_by_email(email: str, update_data: Dict[str, Any]) -> bool:
-    return update_user_by({"email": email}, update_data)
+async def update_user_by_email(email: str, update_data: Dict[str, Any]) -> bool:
+    return await update_user_by({"email": email}, update_data)
 
 
-def verify_user(email: str) -> bool:
-    return update_user_by_email(email, {"is_verified": True})
+async def verify_user(email: str) -> bool:
+    return await update_user_by_email(email, {"is_verified": True})
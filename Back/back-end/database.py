@@ -1,16 +1,28 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from config import get_settings
 
 
 class MongoDBConnection:
-    def __init__(self, db_uri, db_name):
-        self.client = MongoClient(db_uri)
+    def __init__(self, db_uri, db_name, **client_options):
+        # The client only connects on the first operation, inside the running event loop
+        self.client = AsyncIOMotorClient(db_uri, **client_options)
         self.db = self.client[db_name]
 
     def get_collection(self, collection_name):
         return self.db[collection_name]
 
+    def close(self):
+        self.client.close()
+
 
 settings = get_settings()
-database = MongoDBConnection(settings.db_uri, settings.db_name)
+database = MongoDBConnection(
+    settings.db_uri,
+    settings.db_name,
+    maxPoolSize=settings.db_max_pool_size,
+    minPoolSize=settings.db_min_pool_size,
+    serverSelectionTimeoutMS=settings.db_server_selection_timeout_ms,
+    connectTimeoutMS=settings.db_connect_timeout_ms,
+    socketTimeoutMS=settings.db_socket_timeout_ms,
+)
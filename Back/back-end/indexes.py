@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import bson
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from crud.match_crud import MATCH_PAGE_SORT
+from database import database
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "matches": [
+        # Serves the match history pages, sorted on (date, _id) and filtered on user_id
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="user_id_date_id"),
+    ],
+    "otp": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+}
+
+
+async def ensure_indexes():
+    for collection_name, indexes in INDEXES.items():
+        await database.get_collection(collection_name).create_indexes(indexes)
+
+
+# Query shapes used by the CRUD layer as (collection, filter, sort), with placeholder values
+def crud_queries() -> List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]]:
+    object_id = bson.ObjectId()
+    email = "index-check@example.com"
+    date = datetime.now()
+    return [
+        ("users", {"email": email}, []),
+        ("users", {"_id": object_id}, []),
+        ("matches", {"_id": object_id}, []),
+        ("matches", {"user_id": object_id}, MATCH_PAGE_SORT),
+        ("matches", {"user_id": object_id, "$or": [
+            {"date": {"$lt": date}}, {"date": date, "_id": {"$lt": object_id}},
+        ]}, MATCH_PAGE_SORT),
+        ("otp", {"email": email}, []),
+    ]
+
+
+def find_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(find_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(find_stages(value))
+    return stages
+
+
+# Explain every CRUD query, returns the ones whose winning plan scans the whole collection
+async def check_query_plans() -> List[str]:
+    failures = []
+    for collection_name, filters, sort in crud_queries():
+        cursor = database.get_collection(collection_name).find(filters)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        stages = find_stages(plan["queryPlanner"]["winningPlan"])
+        print(f"{collection_name} {filters} sort={sort}: {' <- '.join(stages)}")
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection_name} {filters}")
+    return failures
+
+
+async def main(argv: List[str]) -> int:
+    await ensure_indexes()
+    if "check" not in argv:
+        return 0
+
+    failures = await check_query_plans()
+    if failures:
+        print("Collection scans:", ", ".join(failures))
+        return 1
+    return 0
+
+
+# python indexes.py          create the indexes
+# python indexes.py check    create them and fail on any query doing a COLLSCAN
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
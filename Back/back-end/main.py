@@ -1,9 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from controller.auth_controller import router as auth_router
 from controller.match_controller import router as match_router
+from database import database
+from indexes import ensure_indexes
+from service.password_service import password_hasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    yield
+    password_hasher.close()
+    database.close()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -4,7 +4,7 @@ import bson
 from pydantic import BaseModel, field_serializer
 from typing import Literal, List, Optional
 
-MATCH_STATUS = Literal["pending", "queued", "processing", "finished"]
+MATCH_STATUS = Literal["pending", "queued", "processing", "finished", "failed"]
 
 
 class MatchStatusUpdate(BaseModel):
@@ -40,6 +40,11 @@ class MatchResponse(BaseModel):
     video_url: str
 
 
+class MatchHistoryPage(BaseModel):
+    items: List[MatchResponse]
+    next_cursor: Optional[str] = None
+
+
 class MatchCreate(BaseModel):
     video_id: bson.ObjectId
     user_id: bson.ObjectId
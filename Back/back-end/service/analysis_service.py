@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List
 
-import requests
+import httpx
 from bson import ObjectId
 
 from config import get_settings
@@ -14,7 +14,7 @@ from utils.jwt import create_access_token
 settings = get_settings()
 
 
-def analyze_match(analysis: MatchAnalysisRequest, user: User):
+async def analyze_match(analysis: MatchAnalysisRequest, user: User):
     match_create = MatchCreate(
         video_id=ObjectId(analysis.video_id),
         user_id=user.id,
@@ -22,14 +22,14 @@ def analyze_match(analysis: MatchAnalysisRequest, user: User):
         video_url=generate_download_url(analysis.video_id)
     )
 
-    match_id = create_match(match_create)
-    match = get_match_by_id(match_id)
-    send_analysis_request(match, analysis.keypoints)
+    match_id = await create_match(match_create)
+    match = await get_match_by_id(match_id)
+    await send_analysis_request(match, analysis.keypoints)
 
     return match_id
 
 
-def send_analysis_request(match: Match, keypoints: List[List[int]]) -> dict:
+async def send_analysis_request(match: Match, keypoints: List[List[int]]) -> dict:
     token = create_access_token({}, use_internal=True)
 
     headers = {
@@ -38,17 +38,18 @@ def send_analysis_request(match: Match, keypoints: List[List[int]]) -> dict:
     }
     url = f"http://{settings.analysis_cli_server}:{settings.analysis_cli_port}/analyze"
 
-    response = requests.post(
-        url,
-        headers=headers,
-        json={
-            "user_id": str(match.user_id),
-            "video_id": str(match.video_id),
-            "video_path": match.video_url,
-            "court_points": keypoints
-        },
-        timeout=10
-    )
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.post(
+            url,
+            headers=headers,
+            json={
+                "match_id": str(match.id),
+                "user_id": str(match.user_id),
+                "video_id": str(match.video_id),
+                "video_path": match.video_url,
+                "court_points": keypoints
+            }
+        )
 
     response.raise_for_status()
     return response.json()
@@ -1,20 +1,20 @@
 from schemas.user_schema import UserRegister, NewUser, UserLogin
-from utils.auth import hash_password, verify_password
 from utils.jwt import create_access_token
 from fastapi import HTTPException, status
-from crud.user_crud import create_user, get_user_by_email
+from crud.user_crud import create_user, get_user_by_email, update_user_by
 from service.otp_service import send_otp
+from service.password_service import password_hasher
 
 
-def check_user_exists(email: str):
-    existing_user = get_user_by_email(email)
+async def check_user_exists(email: str):
+    existing_user = await get_user_by_email(email)
     if existing_user:
         return True
     return False
 
 
-def initiate_signup(user_data: UserRegister):
-    if check_user_exists(user_data.email):
+async def initiate_signup(user_data: UserRegister):
+    if await check_user_exists(user_data.email):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email is already registered"
@@ -23,14 +23,14 @@ def initiate_signup(user_data: UserRegister):
     hashed_user = NewUser(
         email=user_data.email,
         username=user_data.username,
-        password=hash_password(user_data.password.get_secret_value())
+        password=await password_hasher.hash(user_data.password.get_secret_value())
     )
-    create_user(hashed_user)
-    send_otp(user_data.email)
+    await create_user(hashed_user)
+    await send_otp(user_data.email)
 
 
-def login_user(user_data: UserLogin):
-    user = get_user_by_email(user_data.email)
+async def login_user(user_data: UserLogin):
+    user = await get_user_by_email(user_data.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,9 +43,14 @@ def login_user(user_data: UserLogin):
             detail="User not verified"
         )
 
-    if not verify_password(user_data.password.get_secret_value(), user.password):
+    valid, new_hash = await password_hasher.verify(user_data.password.get_secret_value(), user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
+
+    # The hash was made with another bcrypt cost
+    if new_hash:
+        await update_user_by({"_id": user.id}, {"password": new_hash})
     return create_access_token({"sub": str(user.id)})
\ No newline at end of file
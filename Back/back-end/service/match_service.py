@@ -1,24 +1,53 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+import bson
 from fastapi import HTTPException
+from config import get_settings
 from crud.match_crud import get_match_by_id, update_match_status, get_matches_by_user
-from schemas.match_schema import MatchStatusUpdate, Match
+from schemas.match_schema import MatchStatusUpdate, Match, MatchHistoryPage, MatchResponse
 from schemas.user_schema import User
 
+settings = get_settings()
+
 
-def change_match_status(match_status: MatchStatusUpdate):
-    match = get_match_by_id(match_status.match_id)
+async def change_match_status(match_status: MatchStatusUpdate):
+    match = await get_match_by_id(match_status.match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
-    update_match_status(match_status.match_id, match_status.status)
+    await update_match_status(match_status.match_id, match_status.status)
+
+
+# Opaque page token holding the (date, _id) of the last match of a page
+def encode_cursor(date: datetime, match_id: bson.ObjectId) -> str:
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{match_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, bson.ObjectId]:
+    try:
+        date, match_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(date), bson.ObjectId(match_id)
+    except (binascii.Error, UnicodeError, ValueError, bson.errors.InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
+async def get_matches(user: User, limit: Optional[int] = None, cursor: Optional[str] = None) -> MatchHistoryPage:
+    limit = min(limit or settings.match_history_page_size, settings.match_history_max_page_size)
+    after = decode_cursor(cursor) if cursor else None
 
-def get_matches(user: User):
-    matches = get_matches_by_user(str(user.id))
-    return matches
+    # One extra document tells whether there is a next page
+    docs = await get_matches_by_user(user.id, limit + 1, after)
+    page = docs[:limit]
+    items = [MatchResponse(id=str(doc["_id"]), status=doc["status"], video_url=doc["video_url"]) for doc in page]
+    next_cursor = encode_cursor(page[-1]["date"], page[-1]["_id"]) if len(docs) > limit else None
+    return MatchHistoryPage(items=items, next_cursor=next_cursor)
 
 
 # In services/match_service.py
-def get_user_match(match_id: str, user: User) -> Match:
-    match = get_match_by_id(match_id)
+async def get_user_match(match_id: str, user: User) -> Match:
+    match = await get_match_by_id(match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     if match.user_id != user.id:
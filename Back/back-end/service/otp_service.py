@@ -1,4 +1,5 @@
 import random
+from starlette.concurrency import run_in_threadpool
 from utils.email import send_otp_email
 from schemas.otp_schema import OTPVerify
 from crud.otp_crud import create_otp, get_otp, delete_otp
@@ -13,16 +14,16 @@ def generate_otp() -> str:
     return otp
 
 
-def send_otp(email: str):
+async def send_otp(email: str):
     otp = generate_otp()
-    create_otp(email, otp)
-    send_otp_email(email, otp)
+    await create_otp(email, otp)
+    await run_in_threadpool(send_otp_email, email, otp)
 
 
-def verify_otp(data: OTPVerify) -> bool:
-    saved_otp = get_otp(data.email)
+async def verify_otp(data: OTPVerify) -> bool:
+    saved_otp = await get_otp(data.email)
     if saved_otp and saved_otp == data.otp:
-        verify_user(data.email)
-        delete_otp(data.email)
+        await verify_user(data.email)
+        await delete_otp(data.email)
         return True
     return False
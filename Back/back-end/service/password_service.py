@@ -0,0 +1,63 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from config import get_settings
+from utils import auth
+
+settings = get_settings()
+
+
+class PasswordHasher:
+    # bcrypt runs in a pool of worker processes so request handlers never hold the GIL for it.
+    # At most workers + queue_size calls are admitted at once, later ones are rejected with a 503
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.admitted = 0
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            # Forking a process that runs the event loop and Motor's threads is unsafe
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    async def run(self, fn, *args):
+        if self.admitted >= self.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        pool = self.get_pool()
+        self.admitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died, start a new pool for the next calls unless a failed call already did
+            if self.pool is pool:
+                self.close()
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Password hashing unavailable")
+        finally:
+            self.admitted -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(auth.hash_password, password)
+
+    # Returns whether the password matches and, when the stored hash was made with another cost, its new hash
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(auth.verify_and_update_password, password, hashed_password)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size)
@@ -1,12 +1,24 @@
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 
 import bcrypt
 
+from config import get_settings
+
 if not hasattr(bcrypt, '__about__'):
     bcrypt.__about__ = type('about', (object,), {'__version__': bcrypt.__version__})
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
+# Hashes of any other cost need an update, so changing bcrypt_rounds rehashes on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 
 def hash_password(password: str) -> str:
@@ -23,3 +35,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         # Log the issue and return False
         print("Invalid hash format detected")
         return False
+
+
+# Returns whether the password matches and, when it does but the hash is outdated, its new hash
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except UnknownHashError:
+        print("Invalid hash format detected")
+        return False, None
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    # Least recently used entries are evicted past maxsize, entries older than ttl seconds expire
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped by every invalidation, so a value read before one is not stored after it.
+        # One counter for all keys keeps no state per key, invalidations are rare
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def version(self) -> int:
+        return self.generation
+
+    # With the version taken before the value was read, the value is dropped if anything was invalidated since
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None):
+        if self.maxsize <= 0:
+            return
+        if version is not None and version != self.generation:
+            return
+        self.entries[key] = (value, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self.generation += 1
+        self.entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        self.generation += 1
+        for key in [key for key, (value, expires_at) in self.entries.items() if predicate(value)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.generation += 1
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,204 @@
+import time
+from FrameReader import FrameReader
+from Predictor import BatchPredictor
+from Pipeline import VideoPipeline, SKIPPED_FRAME
+from HeatmapDecoder import getDecoder
+from Overlay import TrailOverlay, drawBoxes
+from RoiTracker import RoiTracker
+from TrajectorySmoother import DETECTED, SKIPPED
+from TrajectoryStore import TrajectoryWriter, readTrajectory, exportCsv
+from VideoEncoder import VideoEncoder
+
+
+class BallTracker:
+
+    # Ball tracking of whole videos with an already loaded TrackNet model m, so one
+    # model can serve many videos. With roi_model (the same variant built for a lower
+    # input height, sharing the weights of m) frames are predicted on a full width band
+    # around the ball while it is tracked. TrackNet's BatchNormalization is per column of
+    # the input, so the band must have the width of m. With a TrajectorySmoother the positions are cleaned up and gaps
+    # interpolated before they are written. With an AdaptiveStride the model skips frames
+    # of static spans, they are written with the SKIPPED flag. With a PlayerDetector the
+    # players of every frame are detected too, in the same pass over the video.
+    # The annotated video is written with codec (see VideoEncoder), scaled by output_scale and
+    # at output_fps, codec "none" writes no video
+    def __init__(self, m, batch_size=1, workers=4, decoder_name="centroid", trail_length=8,
+                 roi_model=None, roi_refresh=30, roi_min_confidence=0.5, smoother=None, stride=None, players=None,
+                 codec="auto", output_scale=1.0, output_fps=None, verbose=True):
+        self.m = m
+        self.n_classes = m.output_shape[-1]
+        self.height, self.width = m.input_shape[2], m.input_shape[3]
+        self.workers = workers
+        self.decoder_name = decoder_name
+        self.trail_length = trail_length
+        self.smoother = smoother
+        self.stride = stride
+        self.players = players
+        self.codec = codec
+        self.output_scale = output_scale
+        self.output_fps = output_fps
+        self.verbose = verbose
+
+        # Frames are predicted batch_size at a time with one model call,
+        # the next batch is decoded while the model runs on the current one
+        self.predictors = [BatchPredictor(m, self.n_classes, batch_size) for i in range(0, 2)]
+
+        self.roi_model = roi_model
+        self.roi_refresh = roi_refresh
+        self.roi_min_confidence = roi_min_confidence
+        if roi_model is not None:
+            if roi_model.input_shape[3] != self.width:
+                raise ValueError("the ROI model must have the input width %d of the model, not %d"
+                                 % (self.width, roi_model.input_shape[3]))
+            self.full_predictor = BatchPredictor(m, self.n_classes, 1)
+            self.roi_predictor = BatchPredictor(roi_model, self.n_classes, 1)
+
+    # Run the models once so the first video does not pay for building the graph
+    def warmUp(self):
+        predictors = [self.predictors[0]]
+        if self.roi_model is not None:
+            predictors += [self.full_predictor, self.roi_predictor]
+        for predictor in predictors:
+            predictor.add(None)
+            predictor.run()
+
+    # Track the ball in frames start_frame ~ end_frame - 1 (end_frame None: until the end)
+    # of the video, write the annotated video and the positions as a binary table to
+    # trajectory_path, and as CSV to csv_path if given. Returns (number of predicted frames, seconds)
+    def track(self, input_video_path, output_video_path, trajectory_path, start_frame=0, end_frame=None, csv_path=None):
+        # Read the video in order, every frame is resized only once.
+        # The two frames before start_frame are read to complete the first triplet
+        frames = FrameReader(input_video_path, self.width, self.height, start=max(start_frame - 2, 0), end=end_frame)
+
+        # Get video fps & size
+        fps = frames.fps
+        output_width = frames.frame_width
+        output_height = frames.frame_height
+
+        # Turns the heatmap into a ball position (x, y, confidence) in output video coordinates
+        decoder = getDecoder(self.decoder_name, self.m.outputWidth, self.m.outputHeight, output_width, output_height)
+
+        # In order to draw the trajectory of the ball, we need to save the coordinate of previous frames
+        trail = TrailOverlay(self.trail_length)
+
+        # Save prediction images as video
+        output_video = VideoEncoder(output_video_path, fps, output_width, output_height, self.codec,
+                                    self.output_scale, self.output_fps)
+
+        if self.smoother is not None:
+            self.smoother.reset()
+        if self.stride is not None:
+            self.stride.reset()
+
+        # Ball positions (currentFrame, x, y, confidence, flag) and player boxes of this video only,
+        # nothing is left behind when tracking fails
+        with TrajectoryWriter(trajectory_path) as sink:
+            # Both first and second frames can't be predicted, so we directly write the frames to output video
+            # (unless they are the frames before start_frame)
+            for i in range(0, 2):
+                ret, img = frames.read()
+                if ret and frames.index >= start_frame:
+                    if self.players is not None:
+                        boxes, = self.players([img])
+                        sink.writePlayers(frames.index, boxes)
+                        if output_video.enabled:
+                            drawBoxes(img, boxes)
+                    output_video.write(img)
+
+            # Record the position and player boxes of currentFrame and draw them onto output_img, called in frame order
+            def record(currentFrame, position, output_img, boxes=None):
+                skipped = position is SKIPPED_FRAME
+                if skipped:
+                    position = None
+
+                if self.smoother is not None:
+                    # Rows come out once the gap they close is known, a few frames late
+                    sink.write(self.smoother.push(currentFrame, position, skipped))
+                elif skipped:
+                    sink.write([(currentFrame, None, None, None, SKIPPED)])
+                elif position is not None:
+                    sink.write([(currentFrame,) + tuple(position) + (DETECTED,)])
+
+                if self.verbose and currentFrame % 1000 == 0:
+                    print("frame", currentFrame)
+
+                if boxes is not None:
+                    sink.writePlayers(currentFrame, boxes)
+
+                # Draw current frame prediction and previous frames as yellow circles
+                trail.push(position)
+                if not output_video.enabled:
+                    return output_img
+                if boxes is not None:
+                    drawBoxes(output_img, boxes)
+                return trail.draw(output_img)
+
+            start = time.time()
+            if self.roi_model is not None:
+                self._trackRoi(frames, decoder, record, output_video.write)
+            else:
+                # Decode, inference, post-processing and encoding overlap, frames are written in order
+                pipeline = VideoPipeline(frames, self.predictors, lambda currentFrame, pr: decoder(pr), record,
+                                         output_video.write, workers=self.workers, stride=self.stride,
+                                         players=self.players)
+                pipeline.run()
+            elapsed = time.time() - start
+
+            if self.smoother is not None:
+                sink.write(self.smoother.flush())
+
+        if csv_path is not None:
+            exportCsv(readTrajectory(trajectory_path), csv_path)
+
+        # Everything is done, release the video
+        frames.release()
+        output_video.release()
+        return max(frames.count - 2, 0), elapsed
+
+    # Predict frame by frame, on a crop around the ball while it is tracked and on the whole
+    # frame when it is lost. The next crop depends on this detection, so frames are not pipelined
+    def _trackRoi(self, frames, decoder, record, write):
+        roi_height, roi_width = self.roi_model.input_shape[2], self.roi_model.input_shape[3]
+        tracker = RoiTracker(frames.frame_width, frames.frame_height, self.width, self.height, roi_width, roi_height,
+                             refresh=self.roi_refresh, min_confidence=self.roi_min_confidence)
+
+        # The band covers roi_width x roi_height model pixels, this many pixels of the video
+        roi_scale_x = frames.frame_width / float(self.width)
+        roi_scale_y = frames.frame_height / float(self.height)
+        roi_decoder = getDecoder(self.decoder_name, self.roi_model.outputWidth, self.roi_model.outputHeight,
+                                 int(round(tracker.roi_width * roi_scale_x)), int(round(tracker.roi_height * roi_scale_y)))
+
+        while(True):
+            ret, output_img = frames.read()
+            if not ret:
+                break
+            currentFrame = frames.index
+            boxes = self.players([output_img])[0] if self.players is not None else None
+
+            if self.stride is not None and not self.stride.predict(currentFrame, frames.motion()):
+                write(record(currentFrame, SKIPPED_FRAME, output_img, boxes))
+                continue
+
+            position = None
+            region = tracker.region(currentFrame)
+            if region is not None:
+                left, top, width, height = region
+                frames.stack(out=self.roi_predictor.add(None), region=region)
+                (_, pr), = self.roi_predictor.run()
+                position = roi_decoder(pr)
+                if position is not None:
+                    # Back to full frame coordinates
+                    x, y, confidence = position
+                    position = (x + int(round(left * roi_scale_x)), y + int(round(top * roi_scale_y)), confidence)
+
+            # Lost the ball in the crop, or time for a full frame pass
+            if position is None:
+                frames.stack(out=self.full_predictor.add(None))
+                (_, pr), = self.full_predictor.run()
+                position = decoder(pr)
+                region = None
+
+            tracker.update(currentFrame, position, region is None)
+            if self.stride is not None:
+                self.stride.observe(currentFrame, position)
+            write(record(currentFrame, position, output_img, boxes))
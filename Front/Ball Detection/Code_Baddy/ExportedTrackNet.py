@@ -0,0 +1,70 @@
+import copy
+import json
+import numpy as np
+
+
+# Runtimes that can run a model written by export_model.py
+BACKENDS = ("onnxruntime", "opencv")
+
+
+class ExportedTrackNet:
+
+    # TrackNet exported by export_model.py, run on the CPU by onnxruntime or by OpenCV's dnn
+    # module instead of Keras. It has the attributes BatchPredictor and BallTracker read from
+    # a Keras model, but predict gives the class map (batch, height, width) directly.
+    # threads 0 lets the runtime decide
+    def __init__(self, model_path, backend="onnxruntime", threads=0):
+        # Written next to the model by export_model.py
+        with open(model_path + ".json") as file:
+            self.info = json.load(file)
+        self.n_classes = self.info["n_classes"]
+        self.backend = backend
+
+        if backend == "onnxruntime":
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = threads
+            self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            self.input_name = self.session.get_inputs()[0].name
+        elif backend == "opencv":
+            import cv2
+
+            self.net = cv2.dnn.readNetFromONNX(model_path)
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            if threads > 0:
+                cv2.setNumThreads(threads)
+        else:
+            raise ValueError("unknown backend %s, expected one of %s" % (backend, ", ".join(BACKENDS)))
+
+        self.setInputSize(self.info["input_height"], self.info["input_width"])
+
+    # The exported graph takes any height multiple of 8, the width is the one it was trained at
+    def setInputSize(self, height, width):
+        if width != self.info["input_width"]:
+            raise ValueError("the model was exported for input width %d, not %d" % (self.info["input_width"], width))
+        self.input_shape = (None, 9, height, width)
+        self.outputHeight = int(height * self.info["output_scale"])
+        self.outputWidth = int(width * self.info["output_scale"])
+        self.output_shape = (None, self.outputHeight * self.outputWidth, self.n_classes)
+
+    # The same loaded model for another input height, e.g. the bands of ROI tracking
+    def resized(self, height, width):
+        model = copy.copy(self)
+        model.setInputSize(height, width)
+        return model
+
+    # The model output is already the argmax over the classes
+    @property
+    def class_map_output(self):
+        return True
+
+    def predict(self, batch, batch_size=None):
+        if self.backend == "onnxruntime":
+            pr = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            self.net.setInput(batch)
+            pr = self.net.forward()
+        return pr.astype(np.int32, copy=False)
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+
+# Number of consecutive frames TrackNet looks at
+WINDOW = 3
+
+
+class FrameReader:
+
+    # Decode the video strictly in order (no seeking) and keep the last three
+    # frames, resized once to the TrackNet input size, in a ring buffer.
+    # start and end (exclusive) restrict reading to a range of frames, the
+    # only seek is the one to start
+    def __init__(self, video_path, width=640, height=360, start=0, end=None):
+        self.video = cv2.VideoCapture(video_path)
+        if start > 0:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, start)
+        self.fps = int(self.video.get(cv2.CAP_PROP_FPS))
+        self.frame_width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_count = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self.width = width
+        self.height = height
+
+        # Resized frames, ring[head] is always the newest one
+        self.ring = np.zeros((WINDOW, height, width, 3), dtype=np.uint8)
+        self.head = -1
+
+        self.start = start
+        self.end = end
+
+        # Number of frames decoded so far
+        self.count = 0
+
+    # Index of the newest decoded frame in the video
+    @property
+    def index(self):
+        return self.start + self.count - 1
+
+    # True once the ring holds a full triplet
+    def ready(self):
+        return self.count >= WINDOW
+
+    # Decode the next frame, returns (ret, original frame)
+    def read(self):
+        if self.end is not None and self.start + self.count >= self.end:
+            return False, None
+
+        ret, frame = self.video.read()
+        if not ret:
+            return False, None
+
+        # Resize straight into the next slot of the ring, no new allocation
+        self.head = (self.head + 1) % WINDOW
+        cv2.resize(frame, (self.width, self.height), dst=self.ring[self.head])
+        self.count += 1
+        return True, frame
+
+    # Resized frames ordered newest first: (img, img1, img2)
+    def window(self):
+        return tuple(self.ring[(self.head - i) % WINDOW] for i in range(WINDOW))
+
+    # Write the TrackNet input (9, height, width) for the newest frame into out.
+    # Same values as concatenating (img, img1, img2) as float32 and moving
+    # the channel axis first. With region=(left, top, width, height) only that
+    # crop of the resized frames is stacked
+    def stack(self, out=None, region=None):
+        left, top, width, height = region if region is not None else (0, 0, self.width, self.height)
+        if out is None:
+            out = np.empty((3 * WINDOW, height, width), dtype=np.float32)
+        for i, img in enumerate(self.window()):
+            np.copyto(out[3 * i:3 * i + 3], img[top:top + height, left:left + width].transpose(2, 0, 1))
+        return out
+
+    # Mean absolute difference between the two newest resized frames, a cheap measure of motion
+    def motion(self):
+        if self.count < 2:
+            return float("inf")
+        diff = cv2.absdiff(self.ring[self.head], self.ring[(self.head - 1) % WINDOW])
+        return sum(cv2.mean(diff)[:3]) / 3.0
+
+    def release(self):
+        self.video.release()
@@ -0,0 +1,34 @@
+class AdaptiveStride:
+
+    # Choose the frames TrackNet runs on. While consecutive resized frames differ by less
+    # than motion_threshold (mean absolute difference of the pixels, 0~255) and the ball was
+    # not found in the last hold frames, only every stride-th frame is predicted. Motion or a
+    # detection goes back to every frame. Detections may be reported a few frames late
+    def __init__(self, stride=5, motion_threshold=2.0, hold=15):
+        self.stride = stride
+        self.motion_threshold = motion_threshold
+        self.hold = hold
+        self.reset()
+
+    # Forget the previous video
+    def reset(self):
+        # Written by the decode side and the tracking side respectively
+        self.last_motion = None
+        self.last_detection = None
+        self.last_predicted = None
+
+    # Detection result of a predicted frame, position None when no ball was found
+    def observe(self, index, position):
+        if position is not None:
+            self.last_detection = index
+
+    # True when frame index, with the given motion, should be predicted
+    def predict(self, index, motion):
+        if motion >= self.motion_threshold:
+            self.last_motion = index
+
+        active = any(last is not None and index - last < self.hold for last in (self.last_motion, self.last_detection))
+        if active or self.last_predicted is None or index - self.last_predicted >= self.stride:
+            self.last_predicted = index
+            return True
+        return False
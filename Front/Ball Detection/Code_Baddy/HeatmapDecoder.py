@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+
+
+# Heatmap decoders turn the (height, width) uint8 class map predicted by TrackNet
+# into a ball position (x, y, confidence) in output video coordinates, or None
+
+class HoughDecoder:
+
+    # Upsample the heatmap to the video resolution and look for a circle
+    # with 2 <= radius <= 7, the original TrackNet post-processing
+    def __init__(self, model_width, model_height, output_width, output_height, threshold=127):
+        self.output_width = output_width
+        self.output_height = output_height
+        self.threshold = threshold
+
+    def __call__(self, pr):
+        # Reshape the image size as original input image
+        heatmap = cv2.resize(pr, (self.output_width, self.output_height))
+        ret, heatmap = cv2.threshold(heatmap, self.threshold, 255, cv2.THRESH_BINARY)
+
+        circles = cv2.HoughCircles(heatmap, cv2.HOUGH_GRADIENT, dp=1, minDist=1, param1=50, param2=2, minRadius=2, maxRadius=7)
+
+        if circles is not None:
+            if len(circles) == 1:
+                x = int(circles[0][0][0])
+                y = int(circles[0][0][1])
+                return x, y, 1.0
+        return None
+
+
+class CentroidDecoder:
+
+    # Threshold the heatmap at model resolution, keep the connected blob with the
+    # most heat and return its heat weighted centroid scaled to the video resolution.
+    # confidence is the peak heat of that blob in [0, 1]
+    def __init__(self, model_width, model_height, output_width, output_height, threshold=127, min_area=2):
+        self.scale_x = output_width / model_width
+        self.scale_y = output_height / model_height
+        self.threshold = threshold
+        self.min_area = min_area
+
+        # Pixel coordinate grids, allocated once
+        self.xs = np.arange(model_width, dtype=np.float32)
+        self.ys = np.arange(model_height, dtype=np.float32)
+
+    def __call__(self, pr):
+        mask = (pr > self.threshold).view(np.uint8)
+        if not mask.any():
+            return None
+
+        n, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        best, best_heat = None, 0.0
+        for label in range(1, n):
+            if stats[label, cv2.CC_STAT_AREA] < self.min_area:
+                continue
+
+            # Only look at the bounding box of the blob
+            left = stats[label, cv2.CC_STAT_LEFT]
+            top = stats[label, cv2.CC_STAT_TOP]
+            right = left + stats[label, cv2.CC_STAT_WIDTH]
+            bottom = top + stats[label, cv2.CC_STAT_HEIGHT]
+            weights = np.where(labels[top:bottom, left:right] == label, pr[top:bottom, left:right], 0).astype(np.float32)
+
+            heat = weights.sum()
+            if heat > best_heat:
+                best_heat = heat
+                x = (weights.sum(axis=0) @ self.xs[left:right]) / heat
+                y = (weights.sum(axis=1) @ self.ys[top:bottom]) / heat
+                best = (x, y, weights.max() / 255.0)
+
+        if best is None:
+            return None
+
+        x, y, confidence = best
+        # Scale pixel centers from model to video resolution
+        x = int(round((x + 0.5) * self.scale_x - 0.5))
+        y = int(round((y + 0.5) * self.scale_y - 0.5))
+        return x, y, float(confidence)
+
+
+DECODERS = {
+    "hough": HoughDecoder,
+    "centroid": CentroidDecoder,
+}
+
+
+def getDecoder(name, model_width, model_height, output_width, output_height):
+    return DECODERS[name](model_width, model_height, output_width, output_height)
@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+
+
+# Lookup table mapping every class id to its color, grayscale (0,0,0)~(255,255,255) by default
+def getColorTable(n_classes, colors=None):
+    if colors is None:
+        colors = [(i, i, i) for i in range(0, n_classes)]
+    return np.array(colors, dtype=np.uint8)
+
+
+# Map the (height, width) class map through the color table and resize it to
+# (output_width, output_height). The pixels are the same ones the per-class
+# masked sum over a float image followed by cv2.resize and cv2.imwrite gave
+def renderHeatmap(pr, lut, output_width, output_height):
+    output_img = lut[pr]
+
+    if output_img.shape[:2] == (output_height, output_width):
+        return output_img
+
+    # Resize in float64 and round like cv2.imwrite does, so the result is byte for byte
+    # what resizing the old float image produced
+    output_img = cv2.resize(output_img.astype(np.float64), (output_width, output_height))
+    return np.clip(np.rint(output_img), 0, 255).astype(np.uint8)
+
+
+# Render and save one heatmap, runs in the worker processes of predict.py
+def writeHeatmap(output_name, pr, lut, output_width, output_height):
+    cv2.imwrite(output_name, renderHeatmap(pr, lut, output_width, output_height))
+    return output_name
@@ -2,6 +2,10 @@ import numpy as np
 import cv2
 import itertools
 import csv
+import hashlib
+import os
+import queue
+import threading
 from collections import defaultdict
 
 
@@ -45,29 +49,46 @@ def getInputArr( path ,path1 ,path2 , width , height):
 #get output array
 def getOutputArr( path , nClasses ,  width , height  ):
 
-	seg_labels = np.zeros((  height , width  , nClasses ))
+	seg_labels = np.zeros((  height * width  , nClasses ), dtype=np.float32 )
 	try:
 		img = cv2.imread(path, 1)
 		img = cv2.resize(img, ( width , height ))
-		img = img[:, : , 0]
-		np.savetxt("tracknet_img.txt", img, newline="\n")
+		img = quantizeLabels( img[:, : , 0] , nClasses )
 
-		for c in range(nClasses):
-			seg_labels[: , : , c ] = (img == c ).astype(int)
+		#one-hot label in one pass, pixels with value >= nClasses stay all zero
+		seg_labels = getOneHot( img.reshape(-1) , nClasses )
 
 	except Exception as e:
 		print(e)
-		
-	seg_labels = np.reshape(seg_labels, ( width*height , nClasses ))
+
 	return seg_labels
 
 
 
-#read input data and output data
-def InputOutputGenerator( images_path,  batch_size,  n_classes , input_height , input_width , output_height , output_width ):
+#one-hot encode integer labels (..., ) to float32 (..., nClasses)
+def getOneHot( labels , nClasses ):
+	return ( labels[..., np.newaxis] == np.arange(nClasses) ).astype(np.float32)
 
 
-	#read csv file to 'zipped'
+
+#map heat levels 0~255 of a label image to nClasses classes, unchanged for 256 classes
+def quantizeLabels( labels , nClasses ):
+	if nClasses >= 256:
+		return labels
+	return ( labels.astype(np.uint16) * nClasses // 256 ).astype(np.uint8)
+
+
+
+#get sparse output array, the class index of every pixel as ( width*height ) uint8
+def getLabelArr( path , width , height , nClasses=256 ):
+	img = cv2.imread(path, 1)
+	img = cv2.resize(img, ( width , height ))
+	return quantizeLabels( np.ascontiguousarray( img[:, : , 0] ).reshape(-1) , nClasses )
+
+
+
+#read the csv file as a list per column
+def readColumns( images_path ):
 	columns = defaultdict(list)
 	with open(images_path) as f:
 		reader = csv.reader(f)
@@ -75,7 +96,24 @@ def InputOutputGenerator( images_path,  batch_size,  n_classes , input_height ,
 		for row in reader:
 			for (i,v) in enumerate(row):
 				columns[i].append(v)
-	zipped = itertools.cycle( zip(columns[0], columns[1], columns[2], columns[3]) )
+	return columns
+
+
+
+#read input data and output data
+#with labels_path the labels are read from the label store made by buildLabelStore,
+#with sparse_labels the output is the class index of every pixel instead of the one-hot label
+def InputOutputGenerator( images_path,  batch_size,  n_classes , input_height , input_width , output_height , output_width , labels_path="" , sparse_labels=False ):
+
+
+	#read csv file to 'zipped'
+	columns = readColumns( images_path )
+	annotations = columns[3]
+	if labels_path != "":
+		#with a label store the rows are looked up by index instead of reading the annotation image
+		labels = loadLabelStore( images_path , labels_path , output_width , output_height )
+		annotations = range(len(columns[0]))
+	zipped = itertools.cycle( zip(columns[0], columns[1], columns[2], annotations) )
 
 	while True:
 		Input = []
@@ -84,7 +122,170 @@ def InputOutputGenerator( images_path,  batch_size,  n_classes , input_height ,
 		for _ in range( batch_size) :
 			path, path1, path2 , anno = next(zipped)
 			Input.append( getInputArr(path, path1, path2 , input_width , input_height) )
-			Output.append( getOutputArr( anno , n_classes , output_width , output_height) )
+			if sparse_labels:
+				Output.append( quantizeLabels( labels[anno] , n_classes ) if labels_path != "" else getLabelArr( anno , output_width , output_height , n_classes ) )
+			elif labels_path != "":
+				Output.append( getOneHot( quantizeLabels( labels[anno] , n_classes ) , n_classes ) )
+			else:
+				Output.append( getOutputArr( anno , n_classes , output_width , output_height) )
 		#return input&output
 		yield np.array(Input) , np.array(Output)
 
+
+
+#key of a file derived from the csv rows (tuples of columns) at the size ( width , height ),
+#a cache or store is reused only while its key matches
+def rowsKey( rows , width , height ):
+	text = "\n".join( ",".join(row) for row in rows )
+	return hashlib.sha1( ( "%dx%d\n%s" % ( width , height , text ) ).encode("utf-8") ).hexdigest()
+
+
+
+#read the key written next to a cache or store, None when there is none
+def readKey( key_path ):
+	if not os.path.exists(key_path):
+		return None
+	with open(key_path) as file:
+		return file.read().strip()
+
+
+
+#decode every frame listed in the csv file once, resized to ( width , height ), into a
+#uint8 ( frames, 3, height, width ) memory-mapped cache, and the rows of the csv file
+#into ( rows, 3 ) indices of their frames. An existing cache is reused only when its key,
+#a hash of the rows of the csv file and the size, matches
+def buildFrameCache( images_path , cache_path , width , height ):
+
+	frames_path = cache_path + ".frames.npy"
+	triplets_path = cache_path + ".triplets.npy"
+	key_path = cache_path + ".key"
+
+	columns = readColumns( images_path )
+	paths = sorted( set( columns[0] + columns[1] + columns[2] ) )
+	shape = ( len(paths) , 3 , height , width )
+
+	key = rowsKey( zip(columns[0], columns[1], columns[2]) , width , height )
+
+	if os.path.exists(frames_path) and os.path.exists(triplets_path) and readKey(key_path) == key:
+		return np.load( frames_path , mmap_mode="r" ) , np.load( triplets_path )
+
+	if os.path.dirname(cache_path) and not os.path.exists(os.path.dirname(cache_path)):
+		os.makedirs(os.path.dirname(cache_path))
+
+	#the key is written last, a fill that is interrupted leaves no valid cache behind
+	if os.path.exists(key_path):
+		os.remove(key_path)
+
+	frames = np.lib.format.open_memmap( frames_path + ".tmp" , mode="w+" , dtype=np.uint8 , shape=shape )
+	for i, path in enumerate(paths):
+		img = cv2.imread(path, 1)
+		img = cv2.resize(img, ( width , height ))
+		#store channels first, the ordering of TrackNet
+		frames[i] = img.transpose(2, 0, 1)
+	frames.flush()
+	del frames
+	os.replace( frames_path + ".tmp" , frames_path )
+
+	index = { path : i for i, path in enumerate(paths) }
+	triplets = np.array( [ [ index[p], index[p1], index[p2] ] for p, p1, p2 in zip(columns[0], columns[1], columns[2]) ] , dtype=np.int32 )
+	with open( triplets_path + ".tmp" , "wb" ) as file:
+		np.save( file , triplets )
+	os.replace( triplets_path + ".tmp" , triplets_path )
+
+	with open( key_path , "w" ) as file:
+		file.write( key )
+
+	return np.load( frames_path , mmap_mode="r" ) , triplets
+
+
+
+#convert the annotation image of every row of the csv file into one uint8
+#( rows, width*height ) .npy label store holding the heat level 0~255 of every pixel,
+#the generators map it to the classes of the model. Like the frame cache it is keyed on
+#the csv rows and the size, written under a temporary name and the key is written last
+def buildLabelStore( images_path , labels_path , width , height ):
+
+	annotations = readColumns( images_path )[3]
+	key_path = labels_path + ".key"
+
+	if os.path.dirname(labels_path) and not os.path.exists(os.path.dirname(labels_path)):
+		os.makedirs(os.path.dirname(labels_path))
+
+	if os.path.exists(key_path):
+		os.remove(key_path)
+
+	labels = np.lib.format.open_memmap( labels_path + ".tmp" , mode="w+" , dtype=np.uint8 , shape=( len(annotations) , height * width ) )
+	for row, anno in enumerate(annotations):
+		labels[row] = getLabelArr( anno , width , height )
+	labels.flush()
+	del labels
+	os.replace( labels_path + ".tmp" , labels_path )
+
+	with open( key_path , "w" ) as file:
+		file.write( rowsKey( ( ( anno , ) for anno in annotations ) , width , height ) )
+	return np.load( labels_path , mmap_mode="r" )
+
+
+
+#memory-map the label store of the csv file at the model output size,
+#rebuilt when it is missing, incomplete or made from other rows or another size
+def loadLabelStore( images_path , labels_path , width , height ):
+	annotations = readColumns( images_path )[3]
+	key = rowsKey( ( ( anno , ) for anno in annotations ) , width , height )
+	if not os.path.exists(labels_path) or readKey( labels_path + ".key" ) != key:
+		print( "Label store %s does not match %s, rebuilding it" % ( labels_path , images_path ) )
+		return buildLabelStore( images_path , labels_path , width , height )
+	return np.load( labels_path , mmap_mode="r" )
+
+
+
+#read input data and output data through the frame cache, batches are assembled by
+#background threads and handed out in the same order as InputOutputGenerator.
+#with sparse_labels the output is the ( batch_size, width*height ) class index of every
+#pixel instead of the one-hot label. With compact_inputs the input batch stays uint8,
+#a quarter of the float32 size, and is cast by the model when it is fed
+def CachedInputOutputGenerator( images_path,  batch_size,  n_classes , input_height , input_width , output_height , output_width , cache_path , sparse_labels=False , workers=2 , prefetch=4 , labels_path="" , compact_inputs=False ):
+
+	frames , triplets = buildFrameCache( images_path , cache_path , input_width , input_height )
+	annotations = readColumns( images_path )[3]
+	n_rows = len(triplets)
+	labels = None
+	if labels_path != "":
+		labels = loadLabelStore( images_path , labels_path , output_width , output_height )
+
+	#assemble the batch starting at csv row 'start'
+	def getBatch( start ):
+		Input = np.empty( ( batch_size , 9 , input_height , input_width ) , dtype=np.uint8 if compact_inputs else np.float32 )
+		Output = np.empty( ( batch_size , output_height * output_width ) , dtype=np.uint8 )
+		for b in range(batch_size):
+			row = ( start + b ) % n_rows
+			#frames of the triplet are views into the cache, copied once into the batch
+			for k in range(3):
+				Input[ b , 3*k:3*k+3 ] = frames[ triplets[row, k] ]
+			if labels is not None:
+				Output[b] = quantizeLabels( labels[row] , n_classes )
+			else:
+				Output[b] = getLabelArr( annotations[row] , output_width , output_height , n_classes )
+		if not sparse_labels:
+			Output = getOneHot( Output , n_classes )
+		return Input , Output
+
+	#worker w builds batches w, w + workers, w + 2*workers, ...
+	queues = [ queue.Queue( maxsize=max(1, prefetch // workers) ) for _ in range(workers) ]
+
+	def work( w ):
+		try:
+			for n in itertools.count( w , workers ):
+				queues[w].put( getBatch( n * batch_size ) )
+		except Exception as e:
+			#hand the error to the training loop instead of blocking it
+			queues[w].put( e )
+
+	for w in range(workers):
+		threading.Thread( target=work , args=(w,) , daemon=True ).start()
+
+	for n in itertools.count():
+		batch = queues[ n % workers ].get()
+		if isinstance( batch , Exception ):
+			raise batch
+		yield batch
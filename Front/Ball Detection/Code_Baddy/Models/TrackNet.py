@@ -1,17 +1,33 @@
 from keras.models import *
 from keras.layers import *
+from keras import backend as K
+import numpy as np
 
-def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, input_width = 640
+from Models.Variants import TRACKNET_VARIANTS
+
+#build the named variant, n_classes overrides the number of classes of the variant
+def TrackNetVariant( variant , input_height , input_width , n_classes=None , verbose=True ):
+	config = TRACKNET_VARIANTS[variant]
+	if n_classes is None:
+		n_classes = config["n_classes"]
+	return TrackNet( n_classes , input_height , input_width , channels=config["channels"] , half_output=config["half_output"] , verbose=verbose )
+
+#verbose prints the output shape and the model summary
+def TrackNet( n_classes ,  input_height, input_width , channels=1.0 , half_output=False , verbose=True ): # input_height = 360, input_width = 640
+
+	#number of filters of a layer scaled by the channel multiplier
+	def c( filters ):
+		return max( 1 , int( filters * channels ) )
 
 	imgs_input = Input(shape=(9,input_height,input_width))
 
 	#layer1
-	x = Conv2D(64, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(imgs_input)
+	x = Conv2D(c(64), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(imgs_input)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer2
-	x = Conv2D(64, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(64), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -19,12 +35,12 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = MaxPooling2D((2, 2), strides=(2, 2), data_format='channels_first' )(x)
 
 	#layer4
-	x = Conv2D(128, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(128), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer5
-	x = Conv2D(128, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(128), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -32,17 +48,17 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = MaxPooling2D((2, 2), strides=(2, 2), data_format='channels_first' )(x)
 
 	#layer7
-	x = Conv2D(256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer8
-	x = Conv2D(256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer9
-	x = Conv2D(256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
+	x = Conv2D(c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first' )(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -50,17 +66,17 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = MaxPooling2D((2, 2), strides=(2, 2), data_format='channels_first' )(x)
 
 	#layer11
-	x = ( Conv2D(512, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D(c(512), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer12
-	x = ( Conv2D(512, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D(c(512), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer13
-	x = ( Conv2D(512, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D(c(512), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -68,17 +84,17 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = ( UpSampling2D( (2,2), data_format='channels_first'))(x)
 
 	#layer15
-	x = ( Conv2D( 256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D( c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer16
-	x = ( Conv2D( 256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D( c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer17
-	x = ( Conv2D( 256, (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
+	x = ( Conv2D( c(256), (3, 3), kernel_initializer='random_uniform', padding='same', data_format='channels_first'))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -86,25 +102,26 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = ( UpSampling2D( (2,2), data_format='channels_first'))(x)
 
 	#layer19
-	x = ( Conv2D( 128 , (3, 3), kernel_initializer='random_uniform', padding='same' , data_format='channels_first' ))(x)
+	x = ( Conv2D( c(128) , (3, 3), kernel_initializer='random_uniform', padding='same' , data_format='channels_first' ))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer20
-	x = ( Conv2D( 128 , (3, 3), kernel_initializer='random_uniform', padding='same' , data_format='channels_first' ))(x)
+	x = ( Conv2D( c(128) , (3, 3), kernel_initializer='random_uniform', padding='same' , data_format='channels_first' ))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
-	#layer21
-	x = ( UpSampling2D( (2,2), data_format='channels_first'))(x)
+	#layer21, left out when the heatmap is predicted at half resolution
+	if not half_output:
+		x = ( UpSampling2D( (2,2), data_format='channels_first'))(x)
 
 	#layer22
-	x = ( Conv2D( 64 , (3, 3), kernel_initializer='random_uniform', padding='same'  , data_format='channels_first' ))(x)
+	x = ( Conv2D( c(64) , (3, 3), kernel_initializer='random_uniform', padding='same'  , data_format='channels_first' ))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
 	#layer23
-	x = ( Conv2D( 64 , (3, 3), kernel_initializer='random_uniform', padding='same'  , data_format='channels_first' ))(x)
+	x = ( Conv2D( c(64) , (3, 3), kernel_initializer='random_uniform', padding='same'  , data_format='channels_first' ))(x)
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
@@ -113,8 +130,9 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	x = ( Activation('relu'))(x)
 	x = ( BatchNormalization())(x)
 
-	o_shape = Model(imgs_input , x ).output_shape
-	print("layer24 output shape:", o_shape[1],o_shape[2],o_shape[3])
+	o_shape = K.int_shape(x)
+	if verbose:
+		print("layer24 output shape:", o_shape[1],o_shape[2],o_shape[3])
 	#layer24 output shape: 256, 360, 640
 
 	OutputHeight = o_shape[2]
@@ -126,18 +144,96 @@ def TrackNet( n_classes ,  input_height, input_width ): # input_height = 360, in
 	#change dimension order to (360*640, 256)
 	x = (Permute((2, 1)))(x)
 
-	#layer25
-	gaussian_output = (Activation('softmax'))(x)
+	#layer25, kept in float32 when training with a mixed precision policy
+	gaussian_output = (Activation('softmax', dtype='float32'))(x)
 
 	model = Model( imgs_input , gaussian_output)
 	model.outputWidth = OutputWidth
 	model.outputHeight = OutputHeight
 
 	#show model's details
-	model.summary()
+	if verbose:
+		model.summary()
 
 	return model
 
 
 
 
+
+#inference graph of a trained TrackNet for export: BatchNormalization folded into the
+#convolution before it, reshape/permute/softmax replaced by the argmax over the classes
+#(softmax keeps the order of the scores). TrackNet normalizes its channels_first tensors
+#along the last axis, so the BatchNormalization parameters are per column of the trained
+#input width: the width is kept, only the height (multiple of 8) is left free
+def TrackNetInference( model ):
+	import tensorflow as tf
+
+	input_width = model.input_shape[3]
+	imgs_input = Input(shape=(9,None,input_width))
+	x = imgs_input
+
+	layers = model.layers[1:]
+	i = 0
+	while i < len(layers):
+		layer = layers[i]
+
+		#the class scores are complete, the rest only reorders and normalizes them
+		if isinstance( layer , Reshape ):
+			break
+
+		#conv -> relu -> batchnorm
+		if isinstance( layer , Conv2D ) and i + 2 < len(layers) and isinstance( layers[i+1] , Activation ) \
+				and layers[i+1].get_config()['activation'] == 'relu' and isinstance( layers[i+2] , BatchNormalization ):
+			kernel , bias = layer.get_weights()
+			norm = layers[i+2]
+			gamma , beta , mean , variance = norm.get_weights()
+			scale = gamma / np.sqrt( variance + norm.epsilon )
+			shift = beta - mean * scale
+
+			#axis of the parameters in the ( channels, height, width ) tensor
+			axis = norm.axis[0] if isinstance( norm.axis , ( list , tuple ) ) else norm.axis
+			axis = axis % 4
+			shape = [ 1 , 1 , 1 ]
+			shape[ axis - 1 ] = -1
+
+			#relu( z ) * s == relu( z * s ) for s > 0, so positive per channel scales move into
+			#the convolution. Per row or column scales cannot, they stay after the relu
+			positive = np.zeros( scale.shape , dtype=bool )
+			if axis == 1:
+				positive = scale > 0
+				kernel = kernel * np.where( positive , scale , 1 )
+				bias = bias * np.where( positive , scale , 1 )
+			scale = np.where( positive , 1 , scale ).reshape(shape).astype(np.float32)
+			shift = shift.reshape(shape).astype(np.float32)
+
+			conv = Conv2D.from_config( layer.get_config() )
+			x = conv(x)
+			conv.set_weights([ kernel , bias ])
+			x = ( Activation('relu'))(x)
+
+			#what is left of the normalization
+			if positive.all():
+				x = Lambda( lambda t , shift=shift : t + shift )(x)
+			else:
+				x = Lambda( lambda t , scale=scale , shift=shift : t * scale + shift )(x)
+			i += 3
+			continue
+
+		#pooling and upsampling have no weights
+		x = layer.__class__.from_config( layer.get_config() )(x)
+		i += 1
+
+	#the folded graph must give the class scores of the trained model
+	reference = Model( model.input , layers[i-1].output )
+	folded = Model( imgs_input , x )
+	batch = np.random.uniform( 0 , 255 , ( 2 , ) + tuple(model.input_shape[1:]) ).astype(np.float32)
+	expected = reference.predict( batch , verbose=0 )
+	scores = folded.predict( batch , verbose=0 )
+	if not np.allclose( scores , expected , rtol=1e-3 , atol=1e-3 * max( np.abs(expected).max() , 1e-6 ) ):
+		raise ValueError( "folded TrackNet differs from the trained model by up to %g" % np.abs( scores - expected ).max() )
+
+	#class map (batch, height, width)
+	class_map = Lambda( lambda t : tf.argmax( t , axis=1 , output_type=tf.int32 ) )(x)
+
+	return Model( imgs_input , class_map )
@@ -0,0 +1,11 @@
+#TrackNet variants: number of output classes, channel multiplier and whether the
+#heatmap is predicted at half the input resolution.
+#Kept apart from TrackNet.py so scripts can list them without importing Keras
+TRACKNET_VARIANTS = {
+	"full" : dict( n_classes=256 , channels=1.0 , half_output=False ),
+	"levels32" : dict( n_classes=32 , channels=1.0 , half_output=False ),
+	"binary" : dict( n_classes=2 , channels=1.0 , half_output=False ),
+	"slim" : dict( n_classes=256 , channels=0.5 , half_output=False ),
+	"half" : dict( n_classes=256 , channels=1.0 , half_output=True ),
+	"fast" : dict( n_classes=32 , channels=0.5 , half_output=True ),
+}
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+
+class TrailOverlay:
+
+    # Keep the ball positions of the last length frames in a fixed size ring
+    # and draw them as rings straight onto BGR frames, a length of 0 draws no trail
+    def __init__(self, length=8, radius=2, color=(0, 255, 255), thickness=1):
+        self.length = max(length, 0)
+        self.radius = radius
+        self.color = color
+        self.thickness = thickness
+
+        self.positions = np.zeros((self.length, 2), dtype=np.int32)
+        self.valid = np.zeros(self.length, dtype=bool)
+
+        # Slot of the newest position
+        self.head = -1
+
+    # Record the position (x, y, ...) of the next frame, or None when the ball was not found
+    def push(self, position):
+        if self.length == 0:
+            return
+        self.head = (self.head + 1) % self.length
+        if position is None:
+            self.valid[self.head] = False
+        else:
+            self.positions[self.head, 0] = position[0]
+            self.positions[self.head, 1] = position[1]
+            self.valid[self.head] = True
+
+    # Draw the trail onto frame in place (yellow by default) and return it
+    def draw(self, frame):
+        for i in range(0, self.length):
+            if self.valid[i]:
+                center = (int(self.positions[i, 0]), int(self.positions[i, 1]))
+                cv2.circle(frame, center, self.radius, self.color, self.thickness)
+        return frame
+
+
+# Draw boxes, rows of (left, top, right, bottom, ...), onto frame in place (green by default) and return it
+def drawBoxes(frame, boxes, color=(0, 255, 0), thickness=2):
+    for box in boxes:
+        cv2.rectangle(frame, (int(box[0]), int(box[1])), (int(box[2]), int(box[3])), color, thickness)
+    return frame
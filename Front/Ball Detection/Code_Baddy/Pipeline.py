@@ -0,0 +1,185 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# Marks the end of the stream in a stage queue
+END = object()
+
+
+# Position passed to track for frames the model did not run on
+SKIPPED_FRAME = object()
+
+
+# Raised inside a stage when another stage failed and the pipeline is shutting down
+class PipelineStopped(Exception):
+    pass
+
+
+class VideoPipeline:
+
+    # Run the ball tracking of a video as overlapping stages connected by bounded queues:
+    #   decode thread      read + resize frames and fill TrackNet input batches
+    #   calling thread     run the model on full batches (and players on their frames)
+    #   worker pool        detect(index, heatmap) -> position
+    #   track thread       track(index, position, frame, boxes) -> trail, called in frame order
+    #   worker pool        draw(frame, trail) -> output frame
+    #   encode thread      write(output frame), called in frame order
+    # Without draw, track returns the output frame itself
+    # predictors are BatchPredictor objects, with two or more the decode thread
+    # fills one batch while the model runs on the other.
+    # With an AdaptiveStride only the frames it selects are predicted, the others reach
+    # track with the position SKIPPED_FRAME.
+    # players(frames) -> boxes of every frame runs on every decoded frame, boxes is None without it
+    def __init__(self, frames, predictors, detect, track, write, draw=None, workers=4, queue_size=16, stride=None,
+                 players=None):
+        self.frames = frames
+        self.stride = stride
+        self.players = players
+        self.detect = detect
+        self.track = track
+        self.draw = draw
+        self.write = write
+
+        self.free = queue.Queue()
+        for predictor in predictors:
+            self.free.put(predictor)
+        self.batches = queue.Queue(maxsize=len(predictors))
+        self.detections = queue.Queue(maxsize=queue_size)
+        self.drawings = queue.Queue(maxsize=queue_size)
+
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.stop = threading.Event()
+        self.errors = []
+
+    def _put(self, q, item):
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise PipelineStopped()
+
+    def _get(self, q):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise PipelineStopped()
+
+    # Run one stage, the first error stops every other stage
+    def _stage(self, target):
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            self.errors.append(e)
+            self.stop.set()
+
+    def _decode(self):
+        predictor = self._get(self.free)
+
+        # Skipped frames travel with the next predicted frame so batches stay full
+        skipped = []
+        while True:
+            ret, frame = self.frames.read()
+            if not ret:
+                break
+
+            index = self.frames.index
+            if self.stride is not None and not self.stride.predict(index, self.frames.motion()):
+                skipped.append((index, frame))
+                continue
+
+            self.frames.stack(out=predictor.add((index, frame, skipped)))
+            skipped = []
+            if predictor.full():
+                self._put(self.batches, predictor)
+                predictor = self._get(self.free)
+
+        # Predict what is left at the end of the video
+        if len(predictor) > 0:
+            self._put(self.batches, predictor)
+        if skipped:
+            self._put(self.batches, skipped)
+        self._put(self.batches, END)
+
+    def _infer(self):
+        while True:
+            predictor = self._get(self.batches)
+            if predictor is END:
+                break
+
+            # Skipped frames at the end of the video
+            if isinstance(predictor, list):
+                boxes = self._detectPlayers(predictor)
+                for (index, frame), frame_boxes in zip(predictor, boxes):
+                    self._put(self.detections, (index, frame, None, frame_boxes))
+                continue
+
+            results = predictor.run()
+            self.free.put(predictor)
+
+            # Every frame of the batch in order, skipped ones included
+            frames = [item for (index, frame, skipped), heatmap in results for item in skipped + [(index, frame)]]
+            boxes = iter(self._detectPlayers(frames))
+
+            for (index, frame, skipped), heatmap in results:
+                for skipped_index, skipped_frame in skipped:
+                    self._put(self.detections, (skipped_index, skipped_frame, None, next(boxes)))
+                future = self.pool.submit(self.detect, index, heatmap)
+                self._put(self.detections, (index, frame, future, next(boxes)))
+        self._put(self.detections, END)
+
+    # Player boxes of the (index, frame) items, Nones without a player detector
+    def _detectPlayers(self, items):
+        if self.players is None:
+            return [None] * len(items)
+        return self.players([frame for index, frame in items])
+
+    def _track(self):
+        while True:
+            item = self._get(self.detections)
+            if item is END:
+                break
+
+            index, frame, future, boxes = item
+            if future is None:
+                position = SKIPPED_FRAME
+            else:
+                position = future.result()
+                if self.stride is not None:
+                    self.stride.observe(index, position)
+            output = self.track(index, position, frame, boxes)
+            if self.draw is not None:
+                output = self.pool.submit(self.draw, frame, output)
+            self._put(self.drawings, output)
+        self._put(self.drawings, END)
+
+    def _encode(self):
+        while True:
+            output = self._get(self.drawings)
+            if output is END:
+                break
+            if isinstance(output, Future):
+                output = output.result()
+            self.write(output)
+
+    # Process the rest of the video, returns once every frame has been written
+    def run(self):
+        threads = [threading.Thread(target=self._stage, args=(target,), daemon=True)
+                   for target in (self._decode, self._track, self._encode)]
+        for thread in threads:
+            thread.start()
+
+        self._stage(self._infer)
+
+        for thread in threads:
+            thread.join()
+        self.pool.shutdown(wait=True)
+
+        if self.errors:
+            raise self.errors[0]
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class PlayerDetector:
+
+    # YOLOv8 player detection (weights trained with Front/Player_Detection/Player_Detection.ipynb)
+    # on the original decoded frames, so the video is read once for players and ball.
+    # classes restricts the detections to those class ids, None keeps every class
+    def __init__(self, weights_path, confidence=0.25, iou=0.45, imgsz=640, classes=None, device=None):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights_path)
+        self.confidence = confidence
+        self.iou = iou
+        self.imgsz = imgsz
+        self.classes = classes
+        self.device = device
+
+    # Player boxes of a list of BGR frames, one (n, 5) float32 array of
+    # (left, top, right, bottom, confidence) rows per frame
+    def __call__(self, frames):
+        if len(frames) == 0:
+            return []
+
+        results = self.model.predict(frames, conf=self.confidence, iou=self.iou, imgsz=self.imgsz,
+                                     classes=self.classes, device=self.device, verbose=False)
+        boxes = []
+        for result in results:
+            xyxy = result.boxes.xyxy.cpu().numpy()
+            confidence = result.boxes.conf.cpu().numpy()
+            boxes.append(np.concatenate((xyxy, confidence[:, None]), axis=1).astype(np.float32))
+        return boxes
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class BatchPredictor:
+
+    # Gather up to batch_size TrackNet inputs in one preallocated tensor and
+    # run them through the model with a single predict call
+    def __init__(self, model, n_classes, batch_size=1):
+        self.model = model
+        self.n_classes = n_classes
+        self.batch_size = batch_size
+
+        input_shape = model.input_shape[1:]
+        self.batch = np.zeros((batch_size,) + tuple(input_shape), dtype=np.float32)
+
+        # Heatmap size of the model output
+        self.output_height = model.outputHeight
+        self.output_width = model.outputWidth
+
+        # Class id -> heat level 0~255, so models with fewer classes give the same
+        # scale of heatmap as the 256 class model (identity for 256 classes)
+        self.levels = (np.arange(n_classes) * 256 // n_classes).astype(np.uint8)
+
+        # Caller data (frame index, original frame, ...) for every filled slot
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def full(self):
+        return len(self.items) == self.batch_size
+
+    # Reserve the next slot for item and return the input array to fill
+    def add(self, item):
+        slot = self.batch[len(self.items)]
+        self.items.append(item)
+        return slot
+
+    # Predict every filled slot, returns [(item, heatmap)] in the order the
+    # items were added. heatmap is the (height, width) uint8 class map, as heat level 0~255
+    def run(self):
+        n = len(self.items)
+        if n == 0:
+            return []
+
+        pr = self.model.predict(self.batch[:n], batch_size=n)
+        if getattr(self.model, "class_map_output", False):
+            # Exported models already give the argmax over the classes
+            pr = pr.reshape((n, self.output_height, self.output_width))
+        else:
+            pr = pr.reshape((n, self.output_height, self.output_width, self.n_classes)).argmax(axis=3)
+        pr = self.levels[pr] if self.n_classes != 256 else pr.astype(np.uint8)
+
+        items = self.items
+        self.items = []
+        return list(zip(items, pr))
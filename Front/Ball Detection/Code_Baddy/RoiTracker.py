@@ -0,0 +1,60 @@
+class RoiTracker:
+
+    # Decide for every frame whether TrackNet looks at the whole frame or only at a
+    # roi_width x roi_height crop (in model input pixels) around where the ball should be.
+    # BallTracker passes roi_width = model_width, a full width band, see BallTracker.
+    # The next position is extrapolated from the last two confident detections, a full
+    # frame pass is made when the ball was lost or every refresh frames
+    def __init__(self, frame_width, frame_height, model_width, model_height, roi_width, roi_height, refresh=30, min_confidence=0.5):
+        self.model_width = model_width
+        self.model_height = model_height
+        self.roi_width = min(roi_width, model_width)
+        self.roi_height = min(roi_height, model_height)
+        self.refresh = refresh
+        self.min_confidence = min_confidence
+
+        # Video pixels -> model input pixels
+        self.scale_x = model_width / frame_width
+        self.scale_y = model_height / frame_height
+
+        # Last two confident detections as (frame index, x, y) in video coordinates
+        self.last = None
+        self.previous = None
+        self.last_full = None
+
+    # Record the detection (x, y, confidence) of frame index, or None when nothing was found
+    def update(self, index, position, full_frame):
+        if full_frame:
+            self.last_full = index
+
+        if position is None or position[2] < self.min_confidence:
+            # The ball is lost, look at the whole next frame
+            self.last = None
+            self.previous = None
+            return
+
+        self.previous = self.last
+        self.last = (index, position[0], position[1])
+
+    # Crop (left, top, width, height) in model input pixels for frame index,
+    # or None for a full frame pass
+    def region(self, index):
+        if self.last is None:
+            return None
+        if self.last_full is None or index - self.last_full >= self.refresh:
+            return None
+
+        # Constant velocity from the last two detections
+        last_index, x, y = self.last
+        if self.previous is not None:
+            previous_index, previous_x, previous_y = self.previous
+            steps = (index - last_index) / float(last_index - previous_index)
+            x += (x - previous_x) * steps
+            y += (y - previous_y) * steps
+
+        # Center the crop on the prediction, kept inside the frame
+        left = int(round(x * self.scale_x)) - self.roi_width // 2
+        top = int(round(y * self.scale_y)) - self.roi_height // 2
+        left = min(max(left, 0), self.model_width - self.roi_width)
+        top = min(max(top, 0), self.model_height - self.roi_height)
+        return left, top, self.roi_width, self.roi_height
@@ -0,0 +1,119 @@
+import math
+
+
+# How the position of a frame was obtained
+MISSING = 0
+DETECTED = 1
+INTERPOLATED = 2
+# The model did not run on the frame, see FrameStride
+SKIPPED = 3
+
+FLAG_NAMES = {MISSING: "missing", DETECTED: "detected", INTERPOLATED: "interpolated", SKIPPED: "skipped"}
+
+
+class TrajectorySmoother:
+
+    # Streaming post-processing of per-frame ball detections, pushed in frame order.
+    # A detection further than max_speed pixels per frame from the last accepted one is
+    # rejected, gaps of up to max_gap frames are filled by linear interpolation and the
+    # accepted detections are smoothed by an alpha-beta filter (alpha=1, beta=0 keeps
+    # them as they are). At most max_gap frames are held back, memory stays constant
+    def __init__(self, max_speed=60.0, max_gap=10, alpha=0.7, beta=0.3):
+        self.max_speed = max_speed
+        self.max_gap = max_gap
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    # Forget the current track, for a new video
+    def reset(self):
+        # Last emitted detection (index, x, y, confidence) and its velocity in pixels per frame
+        self.last = None
+        self.velocity = (0.0, 0.0)
+
+        # Frames since the last detection as (index, flag), waiting to be interpolated
+        self.pending = []
+
+        # Index of the last frame pushed
+        self.last_pushed = None
+
+    # Detection (x, y, confidence) of frame index, or None when nothing was found.
+    # Returns the rows (index, x, y, confidence, flag) that are final now, in frame order,
+    # x, y and confidence are None for MISSING rows. Skipped frames are interpolated like
+    # frames without a detection but keep the SKIPPED flag. Frames must come in increasing
+    # order, a repeated or earlier index is ignored
+    def push(self, index, position, skipped=False):
+        if self.last_pushed is not None and index <= self.last_pushed:
+            return []
+        self.last_pushed = index
+
+        if position is not None and self.last is not None:
+            last_index, last_x, last_y, last_confidence = self.last
+            steps = index - last_index
+            if math.hypot(position[0] - last_x, position[1] - last_y) > self.max_speed * steps:
+                position = None
+
+        if position is None:
+            self.pending.append((index, SKIPPED if skipped else MISSING))
+            if len(self.pending) <= self.max_gap:
+                return []
+
+            # Too long to interpolate, the next detection starts a new track
+            rows = self._missing()
+            self.last = None
+            self.velocity = (0.0, 0.0)
+            return rows
+
+        x, y, confidence = position
+        if self.last is None:
+            rows = self._missing()
+        else:
+            # Predict from the last detection, then correct towards the measurement
+            last_index, last_x, last_y, last_confidence = self.last
+            steps = index - last_index
+            velocity_x, velocity_y = self.velocity
+            predicted_x = last_x + velocity_x * steps
+            predicted_y = last_y + velocity_y * steps
+            residual_x = x - predicted_x
+            residual_y = y - predicted_y
+            x = predicted_x + self.alpha * residual_x
+            y = predicted_y + self.alpha * residual_y
+            self.velocity = (velocity_x + self.beta * residual_x / steps, velocity_y + self.beta * residual_y / steps)
+
+            # Fill the gap on the line between both detections
+            rows = []
+            for pending, flag in self.pending:
+                t = (pending - last_index) / float(steps)
+                rows.append((pending, last_x + (x - last_x) * t, last_y + (y - last_y) * t,
+                             last_confidence + (confidence - last_confidence) * t,
+                             SKIPPED if flag == SKIPPED else INTERPOLATED))
+            self.pending = []
+
+        self.last = (index, x, y, confidence)
+        rows.append((index, x, y, confidence, DETECTED))
+        return rows
+
+    # The video is over, returns the rows still held back
+    def flush(self):
+        rows = self._missing()
+        self.reset()
+        return rows
+
+    def _missing(self):
+        rows = [(pending, None, None, None, flag) for pending, flag in self.pending]
+        self.pending = []
+        return rows
+
+
+# Columns of ball_positions.csv
+CSV_HEADER = ['Frame', 'X_Position', 'Y_Position', 'Confidence', 'Flag']
+
+
+# CSV rows of trajectory rows, frames without a position are left out
+# unless they were skipped, then the position is left empty
+def csvRows(rows):
+    for index, x, y, confidence, flag in rows:
+        if x is not None and x == x:
+            yield [index, round(x, 2), round(y, 2), round(confidence, 3), FLAG_NAMES[flag]]
+        elif flag == SKIPPED:
+            yield [index, '', '', '', FLAG_NAMES[flag]]
@@ -0,0 +1,206 @@
+import csv
+import os
+import shutil
+import struct
+import numpy as np
+from TrajectorySmoother import SKIPPED, CSV_HEADER, csvRows
+
+
+# Tables of a result file and their columns
+TABLES = (
+    ("ball", (
+        ("frame", np.dtype("<i4")),
+        ("x", np.dtype("<f4")),
+        ("y", np.dtype("<f4")),
+        ("confidence", np.dtype("<f4")),
+        ("flag", np.dtype("u1")),
+    )),
+    ("players", (
+        ("frame", np.dtype("<i4")),
+        ("left", np.dtype("<f4")),
+        ("top", np.dtype("<f4")),
+        ("right", np.dtype("<f4")),
+        ("bottom", np.dtype("<f4")),
+        ("confidence", np.dtype("<f4")),
+    )),
+)
+
+# File layout: MAGIC, the number of rows of every table in the order of TABLES as uint64,
+# then every column of every table as one contiguous little endian array, in order,
+# each starting on an 8 byte boundary
+MAGIC = b"BALLTRJ2"
+HEADER_SIZE = len(MAGIC) + 8 * len(TABLES)
+
+
+# Byte offset of every column for the given row counts of the tables
+def columnOffsets(counts):
+    offsets = []
+    offset = HEADER_SIZE
+    for (table, columns), count in zip(TABLES, counts):
+        for name, dtype in columns:
+            offsets.append(offset)
+            offset += -(-count * dtype.itemsize // 8) * 8
+    return offsets
+
+
+class _TableSpill:
+
+    # Rows of one table gathered block_size at a time, every column spilled to its own file
+    def __init__(self, path, table, columns, block_size):
+        self.columns = columns
+        self.block_size = block_size
+        self.block = [np.empty(block_size, dtype=dtype) for name, dtype in columns]
+        self.filled = 0
+        self.count = 0
+        self.spills = []
+        try:
+            for name, dtype in columns:
+                self.spills.append(open("%s.%s.%s.part" % (path, table, name), "wb"))
+        except BaseException:
+            self.discard()
+            raise
+
+    def add(self, values):
+        for column, value in zip(self.block, values):
+            column[self.filled] = value
+        self.filled += 1
+        if self.filled == self.block_size:
+            self.spill()
+
+    def extend(self, table):
+        self.spill()
+        for spill, (name, dtype) in zip(self.spills, self.columns):
+            spill.write(np.ascontiguousarray(table[name], dtype=dtype).tobytes())
+        self.count += len(table["frame"])
+
+    def spill(self):
+        for spill, column in zip(self.spills, self.block):
+            spill.write(column[:self.filled].tobytes())
+        self.count += self.filled
+        self.filled = 0
+
+    # Close and delete the spill files
+    def discard(self):
+        for spill in self.spills:
+            spill.close()
+            if os.path.exists(spill.name):
+                os.remove(spill.name)
+
+
+class TrajectoryWriter:
+
+    # Columnar binary result file of a video. The ball table holds trajectory rows (index,
+    # x, y, confidence, flag), frames without a position are left out unless they were
+    # skipped, then x, y and confidence are NaN. The players table holds one row per player
+    # box. Rows are gathered block_size at a time and every column is spilled to its own
+    # file, the result file is assembled on close. Used as a context manager it is closed
+    # when the block ends and aborted, leaving no file behind, when the block raises
+    def __init__(self, path, block_size=65536):
+        self.path = path
+        self.tables = {}
+        try:
+            for table, columns in TABLES:
+                self.tables[table] = _TableSpill(path, table, columns, block_size)
+        except BaseException:
+            self.abort()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, rows):
+        ball = self.tables["ball"]
+        for index, x, y, confidence, flag in rows:
+            if x is None:
+                if flag != SKIPPED:
+                    continue
+                x = y = confidence = np.nan
+            ball.add((index, x, y, confidence, flag))
+
+    # Player boxes of frame index, rows of (left, top, right, bottom, confidence)
+    def writePlayers(self, index, boxes):
+        players = self.tables["players"]
+        for left, top, right, bottom, confidence in boxes:
+            players.add((index, left, top, right, bottom, confidence))
+
+    # Append whole tables, e.g. the ones returned by readTables
+    def append(self, tables):
+        for table, columns in TABLES:
+            self.tables[table].extend(tables[table])
+
+    # Assemble the result file under a temporary name, renamed once it is complete
+    def close(self):
+        spills = [self.tables[table] for table, columns in TABLES]
+        temp_path = self.path + ".tmp"
+        try:
+            for spill in spills:
+                spill.spill()
+
+            with open(temp_path, "wb") as file:
+                file.write(MAGIC)
+                for spill in spills:
+                    file.write(struct.pack("<Q", spill.count))
+
+                parts = [part for spill in spills for part in spill.spills]
+                for part, offset in zip(parts, columnOffsets([spill.count for spill in spills])):
+                    # Zero padding up to the column start
+                    file.write(b"\0" * (offset - file.tell()))
+                    part.close()
+                    with open(part.name, "rb") as data:
+                        shutil.copyfileobj(data, file, 1 << 20)
+                file.write(b"\0" * (-file.tell() % 8))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        finally:
+            self.abort()
+
+    # Drop everything written so far, for a video that failed
+    def abort(self):
+        for spill in self.tables.values():
+            spill.discard()
+
+
+# Memory map a result file written by TrajectoryWriter, returns {table: {column name: array}}.
+# Nothing is read or copied until the arrays are used
+def readTables(path):
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("%s is not a trajectory file" % path)
+    counts = struct.unpack("<%dQ" % len(TABLES), header[len(MAGIC):])
+
+    offsets = iter(columnOffsets(counts))
+    tables = {}
+    for (table, columns), count in zip(TABLES, counts):
+        tables[table] = {}
+        for name, dtype in columns:
+            offset = next(offsets)
+            if count == 0:
+                tables[table][name] = np.empty(0, dtype=dtype)
+            else:
+                tables[table][name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    return tables
+
+
+# The ball table of a result file
+def readTrajectory(path):
+    return readTables(path)["ball"]
+
+
+# Write a ball table as ball_positions.csv
+def exportCsv(trajectory, csv_path):
+    with open(csv_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        rows = zip(trajectory["frame"].tolist(), trajectory["x"].tolist(), trajectory["y"].tolist(),
+                   trajectory["confidence"].tolist(), trajectory["flag"].tolist())
+        writer.writerows(csvRows(rows))
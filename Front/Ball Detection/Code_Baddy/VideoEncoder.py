@@ -0,0 +1,94 @@
+import shutil
+import subprocess
+import cv2
+
+
+# Output video encoders: ffmpeg pipes raw frames to ffmpeg's libx264 and moves the MP4
+# index to the front (web streamable), avc1 is H.264 through OpenCV (if its build has it),
+# xvid is the old MPEG-4 output, auto is ffmpeg when installed, otherwise avc1 and xvid
+# when OpenCV cannot write avc1 (the pip builds), none writes no video at all
+CODECS = ("auto", "ffmpeg", "avc1", "xvid", "none")
+
+
+class FfmpegWriter:
+
+    # H.264 MP4 written by an ffmpeg process reading raw BGR frames from a pipe
+    def __init__(self, path, fps, size, preset="veryfast", crf=23):
+        command = ["ffmpeg", "-y", "-loglevel", "error",
+                   "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", "%dx%d" % size, "-r", str(fps), "-i", "-",
+                   "-an", "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+                   "-movflags", "+faststart", path]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.tobytes())
+
+    def release(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError("ffmpeg failed with exit code %d" % self.process.returncode)
+
+
+class VideoEncoder:
+
+    # Write the annotated frames (frame_width x frame_height at fps) with codec, scaled by
+    # scale and with output_fps frames per second (None: the input rate, lower rates drop frames)
+    def __init__(self, path, fps, frame_width, frame_height, codec="auto", scale=1.0, output_fps=None):
+        fallback = None
+        if codec == "auto":
+            codec = "ffmpeg" if shutil.which("ffmpeg") is not None else "avc1"
+            fallback = "xvid"
+        self.codec = codec
+
+        self.fps = fps
+        self.output_fps = min(output_fps, fps) if output_fps else fps
+
+        # libx264 with yuv420p needs even sides
+        self.size = (int(frame_width * scale) // 2 * 2, int(frame_height * scale) // 2 * 2)
+        self.resize = self.size != (frame_width, frame_height)
+
+        # Number of input frames seen
+        self.count = 0
+
+        if codec == "none":
+            self.writer = None
+        elif codec == "ffmpeg":
+            self.writer = FfmpegWriter(path, self.output_fps, self.size)
+        elif codec in ("avc1", "xvid"):
+            self.writer = self._openCv(path, codec)
+            if not self.writer.isOpened() and fallback is not None:
+                print("OpenCV cannot write %s video, writing %s instead" % (codec, fallback))
+                self.codec = codec = fallback
+                self.writer = self._openCv(path, codec)
+            if not self.writer.isOpened():
+                raise RuntimeError("OpenCV cannot write %s video, try another codec" % codec)
+        else:
+            raise ValueError("unknown codec %s, expected one of %s" % (codec, ", ".join(CODECS)))
+
+    def _openCv(self, path, codec):
+        fourcc = cv2.VideoWriter_fourcc(*('avc1' if codec == "avc1" else 'XVID'))
+        return cv2.VideoWriter(path, fourcc, self.output_fps, self.size)
+
+    # False when no video is written, so frames need not be drawn at all
+    @property
+    def enabled(self):
+        return self.writer is not None
+
+    # True when the next frame passed to write is kept at the output frame rate
+    def wants(self):
+        if self.writer is None:
+            return False
+        return int((self.count + 1) * self.output_fps / self.fps) > int(self.count * self.output_fps / self.fps)
+
+    def write(self, frame):
+        keep = self.wants()
+        self.count += 1
+        if not keep:
+            return
+        if self.resize:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.writer.write(frame)
+
+    def release(self):
+        if self.writer is not None:
+            self.writer.release()
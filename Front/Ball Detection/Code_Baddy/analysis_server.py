@@ -0,0 +1,167 @@
+# python analysis_server.py --save_weights_path=weights/model.0 --port=8001 --backend_url=http://localhost:8000 --output_dir=analysis
+# INTERNAL_JWT_SECRET_KEY must hold the same secret as the back-end's internal_jwt_secret_key
+import argparse
+import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from jose import JWTError, jwt
+from Models.Variants import TRACKNET_VARIANTS
+from ExportedTrackNet import BACKENDS
+from HeatmapDecoder import DECODERS
+from BallTracker import BallTracker
+from VideoEncoder import CODECS
+
+# Parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--host", type=str, default="0.0.0.0")
+parser.add_argument("--port", type=int, default=8001)
+parser.add_argument("--backend_url", type=str, default="http://localhost:8000")
+parser.add_argument("--output_dir", type=str, default="analysis")
+parser.add_argument("--queue_size", type=int, default=8)
+parser.add_argument("--save_weights_path", type=str)
+parser.add_argument("--model_path", type=str, default="")
+parser.add_argument("--backend", type=str, default="onnxruntime", choices=BACKENDS)
+parser.add_argument("--threads", type=int, default=0)
+parser.add_argument("--n_classes", type=int, default=None)
+parser.add_argument("--variant", type=str, default="full", choices=sorted(TRACKNET_VARIANTS))
+parser.add_argument("--input_height", type=int, default=360)
+parser.add_argument("--input_width", type=int, default=640)
+parser.add_argument("--batch_size", type=int, default=1)
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--decoder", type=str, default="centroid", choices=sorted(DECODERS))
+parser.add_argument("--codec", type=str, default="auto", choices=CODECS)
+parser.add_argument("--jwt_algorithm", type=str, default=os.environ.get("JWT_ALGORITHM", "HS256"))
+
+args = parser.parse_args()
+secret = os.environ["INTERNAL_JWT_SECRET_KEY"]
+
+# Load TrackNet once for every job and warm it up, so jobs do not pay for graph
+# construction, weight loading or the first predict call
+if args.model_path != "":
+    from ExportedTrackNet import ExportedTrackNet
+
+    m = ExportedTrackNet(args.model_path, args.backend, args.threads)
+    m.setInputSize(args.input_height, args.input_width)
+else:
+    from Models.TrackNet import TrackNetVariant
+
+    m = TrackNetVariant(args.variant, args.input_height, args.input_width, args.n_classes, verbose=False)
+    m.load_weights(args.save_weights_path)
+tracker = BallTracker(m, batch_size=args.batch_size, workers=args.workers, decoder_name=args.decoder,
+                      codec=args.codec, verbose=False)
+tracker.warmUp()
+
+# Accepted jobs waiting for the model, full queue answers 503
+jobs = queue.Queue(maxsize=args.queue_size)
+
+
+# Tell the back-end the new status of the match through /analysis/update-status
+def updateStatus(match_id, status):
+    token = jwt.encode({"exp": int(time.time()) + 300}, secret, algorithm=args.jwt_algorithm)
+    response = requests.post(args.backend_url + "/analysis/update-status",
+                             headers={"Authorization": "Bearer " + token},
+                             json={"match_id": match_id, "status": status}, timeout=10)
+    response.raise_for_status()
+
+
+# updateStatus for the job threads, a back-end that cannot be reached never stops the job
+def postStatus(match_id, status):
+    try:
+        updateStatus(match_id, status)
+    except requests.RequestException:
+        traceback.print_exc()
+
+
+# Download the video of the job unless it is a local file
+def fetchVideo(video_path, directory):
+    if not video_path.startswith(("http://", "https://")):
+        return video_path
+
+    local_path = os.path.join(directory, "input.mp4")
+    with urllib.request.urlopen(video_path) as response, open(local_path, "wb") as file:
+        shutil.copyfileobj(response, file, 1 << 20)
+    return local_path
+
+
+# Run the jobs one by one on the loaded model
+def work():
+    while True:
+        job = jobs.get()
+        match_id = job["match_id"]
+        postStatus(match_id, "processing")
+        try:
+            output_dir = os.path.join(args.output_dir, match_id)
+            os.makedirs(output_dir, exist_ok=True)
+            download_dir = tempfile.mkdtemp(prefix="analysis_")
+            try:
+                input_video_path = fetchVideo(job["video_path"], download_dir)
+                count, elapsed = tracker.track(input_video_path,
+                                               os.path.join(output_dir, "annotated.mp4"),
+                                               os.path.join(output_dir, "ball_positions.traj"))
+            finally:
+                shutil.rmtree(download_dir, ignore_errors=True)
+
+            print("match %s: %d frames at %.2f fps" % (match_id, count, count / elapsed if elapsed > 0 else 0.0))
+        except Exception:
+            traceback.print_exc()
+            postStatus(match_id, "failed")
+        else:
+            postStatus(match_id, "finished")
+        finally:
+            jobs.task_done()
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+
+    def reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # POST /analyze, sent by the back-end's send_analysis_request
+    def do_POST(self):
+        if self.path != "/analyze":
+            return self.reply(404, {"detail": "Not found"})
+
+        authorization = self.headers.get("Authorization", "")
+        try:
+            jwt.decode(authorization[len("Bearer "):], secret, algorithms=[args.jwt_algorithm])
+        except JWTError:
+            return self.reply(403, {"detail": "Invalid token"})
+
+        try:
+            job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            job["match_id"], job["video_path"]
+        except (ValueError, KeyError, TypeError):
+            return self.reply(400, {"detail": "Invalid job"})
+
+        # The match id names the output directory, only a Mongo ObjectId (24 hex digits) is accepted
+        if not isinstance(job["match_id"], str) or not re.fullmatch(r"[0-9a-fA-F]{24}", job["match_id"]):
+            return self.reply(400, {"detail": "Invalid match id"})
+
+        # Posted first, the worker may start the job and post "processing" right after the put
+        postStatus(job["match_id"], "queued")
+        try:
+            jobs.put_nowait(job)
+        except queue.Full:
+            postStatus(job["match_id"], "failed")
+            return self.reply(503, {"detail": "Analysis queue is full"})
+        return self.reply(202, {"match_id": job["match_id"], "queued": jobs.qsize()})
+
+
+threading.Thread(target=work, daemon=True).start()
+server = ThreadingHTTPServer((args.host, args.port), AnalysisHandler)
+print("Analysis worker listening on %s:%d" % (args.host, args.port))
+server.serve_forever()
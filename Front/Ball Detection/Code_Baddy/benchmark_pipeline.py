@@ -0,0 +1,235 @@
+# python benchmark_pipeline.py --resolutions=1280x720,1920x1080 --batch_sizes=1,4 --report_path=bench.json
+# python benchmark_pipeline.py --baseline_path=bench.json --max_regression=0.15
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from Models.Variants import TRACKNET_VARIANTS
+from ExportedTrackNet import BACKENDS
+from FrameReader import FrameReader
+from Predictor import BatchPredictor
+from HeatmapDecoder import DECODERS, getDecoder
+from Overlay import TrailOverlay
+from VideoEncoder import VideoEncoder, CODECS
+from BallTracker import BallTracker
+
+# Parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--resolutions", type=str, default="1280x720,1920x1080")
+parser.add_argument("--batch_sizes", type=str, default="1,4")
+parser.add_argument("--frames", type=int, default=120)
+parser.add_argument("--variant", type=str, default="full", choices=sorted(TRACKNET_VARIANTS))
+parser.add_argument("--model_path", type=str, default="", help="model written by export_model.py instead of a random Keras model")
+parser.add_argument("--backend", type=str, default="onnxruntime", choices=BACKENDS)
+parser.add_argument("--input_height", type=int, default=360)
+parser.add_argument("--input_width", type=int, default=640)
+parser.add_argument("--decoder", type=str, default="centroid", choices=sorted(DECODERS))
+parser.add_argument("--codec", type=str, default="xvid", choices=CODECS)
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--report_path", type=str, default="")
+parser.add_argument("--baseline_path", type=str, default="", help="earlier report, fail when slower by more than max_regression")
+parser.add_argument("--max_regression", type=float, default=0.1)
+parser.add_argument("--min_stage_ms", type=float, default=0.5, help="stages faster than this in the baseline are too noisy to compare")
+
+args = parser.parse_args()
+resolutions = [tuple(int(v) for v in r.split("x")) for r in args.resolutions.split(",") if r]
+batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b]
+
+STAGES = ("decode", "preprocess_legacy", "preprocess", "inference", "heatmap_decode", "overlay", "encode")
+
+
+# Write frames of a moving, bouncing ball over a noisy court colored background
+def makeVideo(path, width, height, n_frames, fps=30):
+    rng = np.random.RandomState(args.seed)
+    background = np.empty((height, width, 3), dtype=np.uint8)
+    background[:] = (60, 120, 40)
+    background = cv2.add(background, rng.randint(0, 20, background.shape).astype(np.uint8))
+
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    x, y = width * 0.1, height * 0.2
+    vx, vy = width / 90.0, 0.0
+    radius = max(3, width // 200)
+    for i in range(0, n_frames):
+        frame = background.copy()
+        cv2.circle(frame, (int(x), int(y)), radius, (230, 230, 230), -1)
+        video.write(frame)
+
+        x += vx
+        vy += height / 900.0
+        y += vy
+        if y > height * 0.9:
+            vy = -abs(vy) * 0.8
+        if x < 0 or x > width:
+            vx = -vx
+    video.release()
+
+
+def loadModel(height, width):
+    if args.model_path != "":
+        from ExportedTrackNet import ExportedTrackNet
+
+        m = ExportedTrackNet(args.model_path, args.backend)
+        m.setInputSize(height, width)
+        return m
+
+    # Random weights, only the speed is measured
+    from Models.TrackNet import TrackNetVariant
+    return TrackNetVariant(args.variant, height, width, verbose=False)
+
+
+# The preprocessing predict_video.py did before FrameReader
+def legacyInput(frame, previous):
+    img = cv2.resize(frame, (args.input_width, args.input_height)).astype(np.float32)
+    previous.insert(0, img)
+    del previous[3:]
+    if len(previous) < 3:
+        return None
+    X = np.concatenate(previous, axis=2)
+    return np.rollaxis(X, 2, 0)
+
+
+# Time every stage one after the other over the video, returns {stage: seconds}, frames
+def timeStages(m, video_path, output_path, batch_size):
+    timings = dict((stage, 0.0) for stage in STAGES)
+    predictor = BatchPredictor(m, m.output_shape[-1], batch_size)
+    predictor.add(None)
+    predictor.run()
+
+    frames = FrameReader(video_path, args.input_width, args.input_height)
+    decoder = getDecoder(args.decoder, m.outputWidth, m.outputHeight, frames.frame_width, frames.frame_height)
+    trail = TrailOverlay()
+    encoder = VideoEncoder(output_path, frames.fps, frames.frame_width, frames.frame_height, args.codec)
+    previous = []
+    count = 0
+
+    def flush():
+        start = time.perf_counter()
+        results = predictor.run()
+        timings["inference"] += time.perf_counter() - start
+
+        for frame, pr in results:
+            start = time.perf_counter()
+            position = decoder(pr)
+            timings["heatmap_decode"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            trail.push(position)
+            frame = trail.draw(frame)
+            timings["overlay"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            encoder.write(frame)
+            timings["encode"] += time.perf_counter() - start
+
+    while True:
+        start = time.perf_counter()
+        ret, frame = frames.read()
+        timings["decode"] += time.perf_counter() - start
+        if not ret:
+            break
+
+        start = time.perf_counter()
+        legacyInput(frame, previous)
+        timings["preprocess_legacy"] += time.perf_counter() - start
+
+        if not frames.ready():
+            continue
+        count += 1
+
+        start = time.perf_counter()
+        frames.stack(out=predictor.add(frame))
+        timings["preprocess"] += time.perf_counter() - start
+
+        if predictor.full():
+            flush()
+    flush()
+
+    frames.release()
+    encoder.release()
+    return timings, count
+
+
+# Throughput of the whole overlapped pipeline, as predict_video.py runs it
+def timePipeline(m, video_path, output_path, batch_size):
+    tracker = BallTracker(m, batch_size=batch_size, workers=args.workers, decoder_name=args.decoder,
+                          codec=args.codec, verbose=False)
+    tracker.warmUp()
+    count, elapsed = tracker.track(video_path, output_path, output_path + ".traj")
+    return count / elapsed if elapsed > 0 else 0.0
+
+
+work_dir = tempfile.mkdtemp(prefix="tracknet_bench_")
+results = []
+try:
+    m = loadModel(args.input_height, args.input_width)
+    for width, height in resolutions:
+        video_path = os.path.join(work_dir, "synthetic_%dx%d.avi" % (width, height))
+        makeVideo(video_path, width, height, args.frames)
+
+        for batch_size in batch_sizes:
+            output_path = os.path.join(work_dir, "output.mp4")
+            timings, count = timeStages(m, video_path, output_path, batch_size)
+            pipeline_fps = timePipeline(m, video_path, output_path, batch_size)
+
+            result = {
+                "resolution": "%dx%d" % (width, height),
+                "batch_size": batch_size,
+                "frames": count,
+                "stage_ms_per_frame": dict((stage, 1000.0 * seconds / max(count, 1)) for stage, seconds in timings.items()),
+                "pipeline_fps": pipeline_fps,
+            }
+            results.append(result)
+
+            print("%-10s batch %-3d pipeline %7.2f fps  %s" % (result["resolution"], batch_size, pipeline_fps, "  ".join(
+                "%s %.2fms" % (stage, result["stage_ms_per_frame"][stage]) for stage in STAGES)))
+finally:
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+report = {
+    "config": {
+        "variant": args.variant,
+        "model_path": args.model_path,
+        "backend": args.backend if args.model_path != "" else "keras",
+        "input_size": "%dx%d" % (args.input_width, args.input_height),
+        "decoder": args.decoder,
+        "codec": args.codec,
+        "frames": args.frames,
+        "cpu_count": os.cpu_count(),
+    },
+    "results": results,
+}
+
+if args.report_path != "":
+    with open(args.report_path, "w") as file:
+        json.dump(report, file, indent=2)
+
+# Compare with the baseline, per resolution and batch size present in both
+if args.baseline_path != "":
+    with open(args.baseline_path) as file:
+        baseline = dict(((r["resolution"], r["batch_size"]), r) for r in json.load(file)["results"])
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["resolution"], result["batch_size"]))
+        if previous is None:
+            continue
+        name = "%s batch %d" % (result["resolution"], result["batch_size"])
+        if result["pipeline_fps"] < previous["pipeline_fps"] * (1 - args.max_regression):
+            regressions.append("%s pipeline %.2f -> %.2f fps" % (name, previous["pipeline_fps"], result["pipeline_fps"]))
+        for stage, ms in result["stage_ms_per_frame"].items():
+            before = previous["stage_ms_per_frame"].get(stage)
+            if before is not None and before >= args.min_stage_ms and ms > before * (1 + args.max_regression):
+                regressions.append("%s %s %.2f -> %.2f ms/frame" % (name, stage, before, ms))
+
+    if regressions:
+        print("Regressions over %.0f%%:" % (100 * args.max_regression))
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+    print("No regression over %.0f%%" % (100 * args.max_regression))
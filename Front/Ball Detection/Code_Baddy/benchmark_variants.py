@@ -0,0 +1,108 @@
+# python benchmark_variants.py --input_video_path=clip.mp4 --labels_path=clip_positions.csv --variants=full,half,fast --weights full=weights/model.0 --weights fast=weights/fast.0
+import argparse
+import csv
+import json
+import time
+import numpy as np
+from Models.TrackNet import TRACKNET_VARIANTS, TrackNetVariant
+from FrameReader import FrameReader
+from Predictor import BatchPredictor
+from HeatmapDecoder import DECODERS, getDecoder
+
+# Parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--input_video_path", type=str)
+parser.add_argument("--labels_path", type=str, help="csv file with Frame,X_Position,Y_Position ground truth")
+parser.add_argument("--variants", type=str, default=",".join(sorted(TRACKNET_VARIANTS)))
+parser.add_argument("--weights", type=str, action="append", default=[], help="variant=path, variants without weights run with random weights (speed only)")
+parser.add_argument("--input_height", type=int, default=360)
+parser.add_argument("--input_width", type=int, default=640)
+parser.add_argument("--batch_size", type=int, default=1)
+parser.add_argument("--decoder", type=str, default="centroid", choices=sorted(DECODERS))
+parser.add_argument("--max_frames", type=int, default=0)
+parser.add_argument("--tolerance", type=float, default=10.0, help="distance in pixels for a detection to count as correct")
+parser.add_argument("--report_path", type=str, default="")
+
+args = parser.parse_args()
+variants = [v for v in args.variants.split(",") if v]
+weights = dict(w.split("=", 1) for w in args.weights)
+
+
+# Ground truth positions {frame: (x, y)}
+def readPositions(path):
+    positions = {}
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        next(reader)
+        for row in reader:
+            positions[int(row[0])] = (float(row[1]), float(row[2]))
+    return positions
+
+
+# Run variant over the clip, returns (predicted positions, frames predicted, seconds)
+def runVariant(variant):
+    m = TrackNetVariant(variant, args.input_height, args.input_width)
+    if variant in weights:
+        m.load_weights(weights[variant])
+
+    frames = FrameReader(args.input_video_path, args.input_width, args.input_height)
+    predictor = BatchPredictor(m, m.output_shape[-1], args.batch_size)
+    decoder = getDecoder(args.decoder, m.outputWidth, m.outputHeight, frames.frame_width, frames.frame_height)
+
+    # Warm up, the first predict call builds the graph
+    predictor.add(None)
+    predictor.run()
+
+    positions = {}
+    count = 0
+    start = time.time()
+    while True:
+        ret, frame = frames.read()
+        if ret and frames.ready():
+            frames.stack(out=predictor.add(frames.index))
+            count += 1
+        if predictor.full() or not ret or args.max_frames > 0 and count >= args.max_frames:
+            for index, pr in predictor.run():
+                position = decoder(pr)
+                if position is not None:
+                    positions[index] = position
+        if not ret or args.max_frames > 0 and count >= args.max_frames:
+            break
+    elapsed = time.time() - start
+    frames.release()
+
+    return positions, count, elapsed
+
+
+# Localization error of positions against the ground truth
+def score(positions, truth, last_frame):
+    truth = {f: p for f, p in truth.items() if 2 <= f <= last_frame}
+    errors = np.array([np.hypot(positions[f][0] - x, positions[f][1] - y) for f, (x, y) in truth.items() if f in positions])
+    false_positives = len([f for f in positions if f not in truth])
+
+    return {
+        "labelled_frames": len(truth),
+        "detection_rate": len(errors) / len(truth) if truth else 0.0,
+        "accuracy": float((errors <= args.tolerance).sum()) / len(truth) if truth else 0.0,
+        "mean_error_px": float(errors.mean()) if len(errors) else None,
+        "median_error_px": float(np.median(errors)) if len(errors) else None,
+        "false_positives": false_positives,
+    }
+
+
+truth = readPositions(args.labels_path)
+report = []
+for variant in variants:
+    positions, count, elapsed = runVariant(variant)
+    result = {"variant": variant, "trained": variant in weights, "frames": count, "fps": count / elapsed if elapsed > 0 else 0.0}
+    result.update(score(positions, truth, count + 1))
+    report.append(result)
+
+    print("%-10s %8.2f fps  detected %5.1f%%  within %.0fpx %5.1f%%  mean error %s  false positives %d%s" % (
+        variant, result["fps"], 100 * result["detection_rate"], args.tolerance, 100 * result["accuracy"],
+        "-" if result["mean_error_px"] is None else "%.2fpx" % result["mean_error_px"],
+        result["false_positives"], "" if result["trained"] else "  (random weights)"))
+
+if args.report_path != "":
+    with open(args.report_path, "w") as file:
+        json.dump(report, file, indent=2)
@@ -0,0 +1,59 @@
+# python export_model.py --save_weights_path=weights/model.0 --export_path=weights/tracknet.onnx --verify --min_agreement=0.99
+import argparse
+import json
+import sys
+import numpy as np
+import tensorflow as tf
+import tf2onnx
+from Models.TrackNet import TRACKNET_VARIANTS, TrackNetVariant, TrackNetInference
+
+# Parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--save_weights_path", type=str)
+parser.add_argument("--export_path", type=str, default="tracknet.onnx")
+parser.add_argument("--n_classes", type=int, default=None)
+parser.add_argument("--variant", type=str, default="full", choices=sorted(TRACKNET_VARIANTS))
+parser.add_argument("--input_height", type=int, default=360)
+parser.add_argument("--input_width", type=int, default=640)
+parser.add_argument("--opset", type=int, default=13)
+parser.add_argument("--verify", action="store_true")
+parser.add_argument("--min_agreement", type=float, default=0.99, help="with --verify, exit with an error below this class map agreement")
+
+args = parser.parse_args()
+
+# Load the trained TrackNet model
+m = TrackNetVariant(args.variant, args.input_height, args.input_width, args.n_classes, verbose=False)
+m.load_weights(args.save_weights_path)
+n_classes = m.output_shape[-1]
+
+# Freeze it into the inference graph, checked against the trained model. The BatchNormalization
+# parameters are per column, so the width stays the trained one, batch and height are left free
+inference = TrackNetInference(m)
+spec = (tf.TensorSpec((None, 9, None, args.input_width), tf.float32, name="frames"),)
+tf2onnx.convert.from_keras(inference, input_signature=spec, opset=args.opset, output_path=args.export_path)
+
+# What ExportedTrackNet needs to stand in for the Keras model
+with open(args.export_path + ".json", "w") as file:
+    json.dump({
+        "variant": args.variant,
+        "n_classes": n_classes,
+        "input_height": args.input_height,
+        "input_width": args.input_width,
+        "output_scale": m.outputHeight / float(args.input_height),
+    }, file, indent=2)
+
+print("Exported", args.export_path)
+
+# Compare the class maps of both models on random frames
+if args.verify:
+    from ExportedTrackNet import ExportedTrackNet
+
+    exported = ExportedTrackNet(args.export_path)
+    frames = np.random.uniform(0, 255, (2, 9, args.input_height, args.input_width)).astype(np.float32)
+    expected = m.predict(frames, batch_size=2).argmax(axis=2).reshape((2, m.outputHeight, m.outputWidth))
+    pr = exported.predict(frames)
+    agreement = np.mean(pr == expected)
+    print("Class map agreement: %.4f" % agreement)
+    if agreement < args.min_agreement:
+        print("Agreement below %.4f, the export is broken" % args.min_agreement)
+        sys.exit(1)
@@ -1,82 +1,120 @@
 import argparse
-import Models , LoadBatches
-import cv2
-import numpy as np
+import LoadBatches
+from Models.Variants import TRACKNET_VARIANTS
+from ExportedTrackNet import BACKENDS
+from Predictor import BatchPredictor
+from HeatmapWriter import getColorTable, writeHeatmap
+from collections import deque
+from multiprocessing import Pool
 import glob
 import os
 
-#parse parameters
-parser = argparse.ArgumentParser()
-parser.add_argument("--save_weights_path", type = str  )
-parser.add_argument("--test_images_path", type = str , default = "")
-parser.add_argument("--output_path", type = str , default = "")
-parser.add_argument("--input_height", type=int , default = 360  )
-parser.add_argument("--input_width", type=int , default = 640 )
-parser.add_argument("--output_height", type=int , default = 224  )
-parser.add_argument("--output_width", type=int , default = 224 )
-parser.add_argument("--n_classes", type=int )
-
-args = parser.parse_args()
-n_classes = args.n_classes
-images_path = args.test_images_path
-output_path = args.output_path
-input_width =  args.input_width
-input_height = args.input_height
-output_width =  args.output_width
-output_height = args.output_height
-
-#load TrackNet model
-modelTN = Models.TrackNet.TrackNet
-m = modelTN( n_classes , input_height=input_height, input_width=input_width )
-m.compile(loss='categorical_crossentropy', optimizer= 'adadelta', metrics=['accuracy'])
-m.load_weights( args.save_weights_path )
-
-
-#get TrackNet output height and width
-model_output_height = m.outputHeight
-model_output_width = m.outputWidth
-
-#create grayscale RGB (0,0,0)~(255,255,255)
-colors = [  ( i, i, i  ) for i in range(0, n_classes)  ]
-
-#predict each clips from 1 to 82
-for clip in range(1,82):
-
-	#get all JPG images in the path
-	images = glob.glob( images_path + str(clip) + "/*.jpg" )
-	images.sort()
-
-
-	#create folder for saving output image  
-	if not os.path.exists(output_path + str(clip) + "/"):
-	    os.makedirs(output_path + str(clip) + "/")
-
-	#predict each images
-	#since TrackNet cant predict first and second images, so we start from third image
-	for i in range(2,len(images)):
-
-		output_name = images[i].replace( images_path,  output_path)
-
-		#load input data
-		X = LoadBatches.getInputArr( images[i], images[i-1], images[i-2], input_width, input_height )
-		#prdict heatmap
-		pr = m.predict( np.array([X]) )[0]
-
-		#since TrackNet output is ( net_output_height*model_output_width , n_classes )
-		#so we need to reshape image as ( net_output_height, model_output_width , n_classes(depth) )
-		pr = pr.reshape(( model_output_height, model_output_width , n_classes ) ).argmax( axis=2 )
-		
-		#declare variable for output image
-		output_img = np.zeros( (  model_output_height, model_output_width , 3  ) )
-
-		#set RGB value for each pixel predciton
-		for c in range(n_classes):
-			output_img[:,:,0] += ( (pr[:,: ] == c )*( colors[c][0] )).astype('uint8')
-			output_img[:,:,1] += ((pr[:,: ] == c )*( colors[c][1] )).astype('uint8')
-			output_img[:,:,2] += ((pr[:,: ] == c )*( colors[c][2] )).astype('uint8')
-
-		#reshape the image size as original input image
-		output_img = cv2.resize(output_img  , (output_width , output_height ))
-
-		#output heatmap image
-		cv2.imwrite(  output_name , output_img )
+
+def main():
+	#parse parameters
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--save_weights_path", type = str  )
+	parser.add_argument("--test_images_path", type = str , default = "")
+	parser.add_argument("--output_path", type = str , default = "")
+	parser.add_argument("--input_height", type=int , default = 360  )
+	parser.add_argument("--input_width", type=int , default = 640 )
+	parser.add_argument("--output_height", type=int , default = 224  )
+	parser.add_argument("--output_width", type=int , default = 224 )
+	parser.add_argument("--model_path", type = str , default = "" )
+	parser.add_argument("--backend", type = str , default = "onnxruntime" , choices = BACKENDS )
+	parser.add_argument("--threads", type=int , default = 0 )
+	parser.add_argument("--n_classes", type=int , default = None )
+	parser.add_argument("--variant", type=str , default = "full" , choices = sorted(TRACKNET_VARIANTS) )
+	parser.add_argument("--batch_size", type=int , default = 1 )
+	parser.add_argument("--workers", type=int , default = 4 )
+
+	args = parser.parse_args()
+	n_classes = args.n_classes
+	images_path = args.test_images_path
+	output_path = args.output_path
+	input_width =  args.input_width
+	input_height = args.input_height
+	output_width =  args.output_width
+	output_height = args.output_height
+	batch_size = args.batch_size
+	workers = args.workers
+
+	#heatmaps are rendered and saved by worker processes while the model keeps predicting,
+	#start them before the model is loaded so they do not inherit it
+	pool = Pool( workers ) if workers > 0 else None
+
+	if args.model_path != "":
+		#model exported by export_model.py, runs on the CPU without Keras
+		from ExportedTrackNet import ExportedTrackNet
+		m = ExportedTrackNet( args.model_path , args.backend , args.threads )
+		m.setInputSize( input_height , input_width )
+	else:
+		#load TrackNet model, n_classes defaults to the number of classes of the variant
+		from Models.TrackNet import TrackNetVariant
+		m = TrackNetVariant( args.variant , input_height , input_width , n_classes )
+		m.load_weights( args.save_weights_path )
+	n_classes = m.output_shape[-1]
+
+	#predict batch_size images with one model call
+	predictor = BatchPredictor( m , n_classes , batch_size )
+
+
+	#get TrackNet output height and width
+	model_output_height = m.outputHeight
+	model_output_width = m.outputWidth
+
+	#create grayscale RGB (0,0,0)~(255,255,255) lookup table, the predicted heatmaps are heat levels 0~255
+	lut = getColorTable( 256 )
+
+	pending = deque()
+
+	def saveHeatmap( output_name , pr ):
+		if pool is None:
+			writeHeatmap( output_name , pr , lut , output_width , output_height )
+			return
+
+		#bound the number of heatmaps waiting for a worker
+		pending.append( pool.apply_async( writeHeatmap , ( output_name , pr , lut , output_width , output_height ) ) )
+		while len(pending) > 4 * workers:
+			pending.popleft().get()
+
+	#predict each clips from 1 to 82
+	for clip in range(1,82):
+
+		#get all JPG images in the path
+		images = glob.glob( images_path + str(clip) + "/*.jpg" )
+		images.sort()
+
+
+		#create folder for saving output image  
+		if not os.path.exists(output_path + str(clip) + "/"):
+		    os.makedirs(output_path + str(clip) + "/")
+
+		#predict each images
+		#since TrackNet cant predict first and second images, so we start from third image
+		for i in range(2,len(images)):
+
+			output_name = images[i].replace( images_path,  output_path)
+
+			#load input data into the next slot of the batch
+			predictor.add( output_name )[:] = LoadBatches.getInputArr( images[i], images[i-1], images[i-2], input_width, input_height )
+
+			#prdict heatmaps once the batch is full or the clip is finished
+			if not predictor.full() and i < len(images) - 1:
+				continue
+
+			#output heatmap images
+			for output_name, pr in predictor.run():
+				saveHeatmap( output_name , pr )
+
+	#wait for the last heatmaps to be written
+	while pending:
+		pending.popleft().get()
+	if pool is not None:
+		pool.close()
+		pool.join()
+
+
+#worker processes re-import this script on platforms that spawn them, only the parent runs main
+if __name__ == "__main__":
+	main()
@@ -1,169 +1,139 @@
-import csv
 import argparse
 # import Models
-from Models.TrackNet import TrackNet
-import queue
-import cv2
-import numpy as np
-from PIL import Image, ImageDraw
+from Models.Variants import TRACKNET_VARIANTS
+from ExportedTrackNet import BACKENDS
+from HeatmapDecoder import DECODERS
+from BallTracker import BallTracker
+from TrajectorySmoother import TrajectorySmoother
+from FrameStride import AdaptiveStride
+from PlayerDetector import PlayerDetector
+from VideoEncoder import CODECS
 
 # Parse parameters
 parser = argparse.ArgumentParser()
 parser.add_argument("--input_video_path", type=str)
 parser.add_argument("--output_video_path", type=str, default = "")
 parser.add_argument("--save_weights_path", type = str)
-parser.add_argument("--n_classes", type=int)
+parser.add_argument("--model_path", type=str, default="")
+parser.add_argument("--backend", type=str, default="onnxruntime", choices=BACKENDS)
+parser.add_argument("--threads", type=int, default=0)
+parser.add_argument("--n_classes", type=int, default=None)
+parser.add_argument("--variant", type=str, default="full", choices=sorted(TRACKNET_VARIANTS))
+parser.add_argument("--input_height", type=int, default=360)
+parser.add_argument("--input_width", type=int, default=640)
+parser.add_argument("--batch_size", type=int, default=1)
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--decoder", type=str, default="centroid", choices=sorted(DECODERS))
+parser.add_argument("--trail_length", type=int, default=8)
+parser.add_argument("--codec", type=str, default="auto", choices=CODECS)
+parser.add_argument("--output_scale", type=float, default=1.0)
+parser.add_argument("--output_fps", type=float, default=0)
+parser.add_argument("--trajectory_path", type=str, default="")
+parser.add_argument("--positions_path", type=str, default="")
+parser.add_argument("--start_frame", type=int, default=0)
+parser.add_argument("--end_frame", type=int, default=-1)
+parser.add_argument("--roi_tracking", action="store_true")
+parser.add_argument("--roi_width", type=int, default=0, help="must be the input width (0), the ROI is a full width band")
+parser.add_argument("--roi_height", type=int, default=184)
+parser.add_argument("--roi_refresh", type=int, default=30)
+parser.add_argument("--roi_min_confidence", type=float, default=0.5)
+parser.add_argument("--adaptive_stride", type=int, default=0)
+parser.add_argument("--motion_threshold", type=float, default=2.0)
+parser.add_argument("--stride_hold", type=int, default=15)
+parser.add_argument("--player_weights_path", type=str, default="")
+parser.add_argument("--player_confidence", type=float, default=0.25)
+parser.add_argument("--player_imgsz", type=int, default=640)
+parser.add_argument("--smooth", action="store_true")
+parser.add_argument("--max_speed", type=float, default=60.0)
+parser.add_argument("--max_gap", type=int, default=10)
+parser.add_argument("--smooth_alpha", type=float, default=0.7)
+parser.add_argument("--smooth_beta", type=float, default=0.3)
 
 args = parser.parse_args()
 input_video_path = args.input_video_path
 output_video_path = args.output_video_path
 save_weights_path = args.save_weights_path
 n_classes = args.n_classes
+batch_size = args.batch_size
+workers = args.workers
+decoder_name = args.decoder
+trail_length = args.trail_length
+roi_tracking = args.roi_tracking
+trajectory_path = args.trajectory_path
+# Optional CSV export of the positions
+positions_path = args.positions_path if args.positions_path != "" else None
+
+# Only frames start_frame ~ end_frame - 1 are predicted and written (end_frame -1: until the end).
+# The two frames before start_frame are read to complete the first triplet
+start_frame = args.start_frame
+end_frame = args.end_frame if args.end_frame >= 0 else None
 
 if output_video_path == "":
     # Output video in same path
     output_video_path = input_video_path.split('.')[0] + "_TrackNet.mp4"
 
-# Get video fps & size
-video = cv2.VideoCapture(input_video_path)
-fps = int(video.get(cv2.CAP_PROP_FPS))
-output_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
-output_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-# Start from first frame
-currentFrame = 0
+if trajectory_path == "":
+    # Ball positions next to the output video
+    trajectory_path = output_video_path.rsplit('.', 1)[0] + ".traj"
 
 # Width and height in TrackNet
-width, height = 640, 360
-img, img1, img2 = None, None, None
-
-# Load TrackNet model
-modelFN = TrackNet
-m = modelFN(n_classes, input_height=height, input_width=width)
-m.compile(loss='categorical_crossentropy', optimizer='adadelta', metrics=['accuracy'])
-m.load_weights(save_weights_path)
-
-# In order to draw the trajectory of tennis, we need to save the coordinate of previous 7 frames
-q = queue.deque()
-for i in range(0, 8):
-    q.appendleft(None)
-
-# Save prediction images as video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-output_video = cv2.VideoWriter(output_video_path, fourcc, fps, (output_width, output_height))
-
-# Both first and second frames can't be predicted, so we directly write the frames to output video
-# Capture frame-by-frame
-video.set(1, currentFrame)
-ret, img1 = video.read()
-# Write image to video
-output_video.write(img1)
-currentFrame += 1
-# Resize it
-img1 = cv2.resize(img1, (width, height))
-img1 = img1.astype(np.float32)
-
-# Capture frame-by-frame
-video.set(1, currentFrame)
-ret, img = video.read()
-# Write image to video
-output_video.write(img)
-currentFrame += 1
-# Resize it
-img = cv2.resize(img, (width, height))
-img = img.astype(np.float32)
-
-# Open a CSV file to append ball positions (currentFrame, x, y)
-with open('ball_positions.csv', mode='a', newline='') as file:
-    writer = csv.writer(file)
-
-    # Write header if the file is empty (only the first time)
-    if file.tell() == 0:
-        writer.writerow(['Frame', 'X_Position', 'Y_Position'])
-
-    while(True):
-
-        img2 = img1
-        img1 = img
-
-        # Capture frame-by-frame
-        video.set(1, currentFrame)
-        ret, img = video.read()
-
-        # If there is no frame in the video, break
-        if not ret:
-            break
-
-        # img is the frame that TrackNet will predict the position
-        output_img = img
-
-        # Resize it
-        img = cv2.resize(img, (width, height))
-        img = img.astype(np.float32)
-
-        # Combine three images to (width, height, rgb*3)
-        X = np.concatenate((img, img1, img2), axis=2)
-
-        # Since the ordering of TrackNet is 'channels_first', we need to change the axis
-        X = np.rollaxis(X, 2, 0)
-        pr = m.predict(np.array([X]))[0]
-
-        pr = pr.reshape((height, width, n_classes)).argmax(axis=2)
-        pr = pr.astype(np.uint8)
-
-        # Reshape the image size as original input image
-        heatmap = cv2.resize(pr, (output_width, output_height))
-        ret, heatmap = cv2.threshold(heatmap, 127, 255, cv2.THRESH_BINARY)
-
-        # Find the circle in the image with 2 <= radius <= 7
-        circles = cv2.HoughCircles(heatmap, cv2.HOUGH_GRADIENT, dp=1, minDist=1, param1=50, param2=2, minRadius=2, maxRadius=7)
-
-        # In order to draw the circle in output_img, we need to use PIL library
-        PIL_image = cv2.cvtColor(output_img, cv2.COLOR_BGR2RGB)
-        PIL_image = Image.fromarray(PIL_image)
-
-        if circles is not None:
-            if len(circles) == 1:
-                x = int(circles[0][0][0])
-                y = int(circles[0][0][1])
-
-                # Append currentFrame, x, and y to the CSV file
-                writer.writerow([currentFrame, x, y])
-
-                # Print current frame and coordinates
-                print(currentFrame, x, y)
-
-                # Push x, y to queue
-                q.appendleft([x, y])
-                q.pop()
-            else:
-                # Push None to queue
-                q.appendleft(None)
-                q.pop()
-        else:
-            # Push None to queue
-            q.appendleft(None)
-            q.pop()
-
-        # Draw current frame prediction and previous 7 frames as yellow circles
-        for i in range(0, 8):
-            if q[i] is not None:
-                draw_x = q[i][0]
-                draw_y = q[i][1]
-                bbox = (draw_x - 2, draw_y - 2, draw_x + 2, draw_y + 2)
-                draw = ImageDraw.Draw(PIL_image)
-                draw.ellipse(bbox, outline='yellow')
-                del draw
-
-        # Convert PIL image format back to OpenCV image format
-        opencvImage = cv2.cvtColor(np.array(PIL_image), cv2.COLOR_RGB2BGR)
-        # Write image to output video
-        output_video.write(opencvImage)
-
-        # Next frame
-        currentFrame += 1
-
-# Everything is done, release the video
-video.release()
-output_video.release()
+width, height = args.input_width, args.input_height
+
+# The ROI is a band of the full input width: TrackNet's BatchNormalization has one set of
+# parameters per input column, so the ROI model shares the weights of the full one only at
+# the same width. Its height is clamped to the input and rounded down to a multiple of 8,
+# so the three poolings and upsamplings of TrackNet divide evenly
+roi_width = width
+roi_height = min(args.roi_height, height) // 8 * 8
+if roi_tracking:
+    if args.roi_width not in (0, width):
+        parser.error("--roi_width must be the input width %d, the ROI is a full width band" % width)
+    if roi_height <= 0:
+        parser.error("--roi_height must be at least 8")
+    if roi_height != args.roi_height:
+        print("ROI height %d adjusted to %d" % (args.roi_height, roi_height))
+
+if args.model_path != "":
+    # Model exported by export_model.py, runs on the CPU without Keras
+    from ExportedTrackNet import ExportedTrackNet
+
+    m = ExportedTrackNet(args.model_path, args.backend, args.threads)
+    m.setInputSize(height, width)
+    m_roi = m.resized(roi_height, roi_width) if roi_tracking else None
+else:
+    from Models.TrackNet import TrackNetVariant
+
+    # Load TrackNet model, n_classes defaults to the number of classes of the variant
+    m = TrackNetVariant(args.variant, height, width, n_classes, verbose=False)
+    m.load_weights(save_weights_path)
+
+    # In ROI tracking mode a second model, sharing the weights, runs on a band around the ball
+    m_roi = None
+    if roi_tracking:
+        m_roi = TrackNetVariant(args.variant, roi_height, roi_width, n_classes, verbose=False)
+        m_roi.set_weights(m.get_weights())
+
+# Reject jumps faster than max_speed pixels per frame, interpolate gaps up to max_gap frames
+smoother = None
+if args.smooth:
+    smoother = TrajectorySmoother(args.max_speed, args.max_gap, args.smooth_alpha, args.smooth_beta)
+
+# Predict only every adaptive_stride-th frame while the picture is still and no ball is seen
+stride = None
+if args.adaptive_stride > 1:
+    stride = AdaptiveStride(args.adaptive_stride, args.motion_threshold, args.stride_hold)
+
+# Detect players in the same pass, with the YOLOv8 weights of Front/Player_Detection
+players = None
+if args.player_weights_path != "":
+    players = PlayerDetector(args.player_weights_path, args.player_confidence, imgsz=args.player_imgsz)
+
+tracker = BallTracker(m, batch_size=batch_size, workers=workers, decoder_name=decoder_name, trail_length=trail_length,
+                      roi_model=m_roi, roi_refresh=args.roi_refresh, roi_min_confidence=args.roi_min_confidence,
+                      smoother=smoother, stride=stride, players=players,
+                      codec=args.codec, output_scale=args.output_scale, output_fps=args.output_fps or None)
+count, elapsed = tracker.track(input_video_path, output_video_path, trajectory_path, start_frame, end_frame, positions_path)
+
 print("Finish")
+if elapsed > 0:
+    print("Predicted %d frames at %.2f fps" % (count, count / elapsed))
@@ -0,0 +1,114 @@
+# python predict_video_parallel.py --input_video_path=match.mp4 --save_weights_path=weights/model.0 --n_classes=256 --processes=8
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import cv2
+from VideoEncoder import VideoEncoder, CODECS
+from TrajectoryStore import TrajectoryWriter, readTables, readTrajectory, exportCsv
+
+# Parse parameters, everything not listed here is passed on to predict_video.py
+parser = argparse.ArgumentParser()
+parser.add_argument("--input_video_path", type=str)
+parser.add_argument("--output_video_path", type=str, default="")
+parser.add_argument("--trajectory_path", type=str, default="")
+parser.add_argument("--positions_path", type=str, default="")
+parser.add_argument("--codec", type=str, default="auto", choices=CODECS)
+parser.add_argument("--processes", type=int, default=os.cpu_count())
+parser.add_argument("--min_chunk_frames", type=int, default=300)
+
+args, predict_args = parser.parse_known_args()
+input_video_path = args.input_video_path
+output_video_path = args.output_video_path
+
+if output_video_path == "":
+    # Output video in same path
+    output_video_path = input_video_path.split('.')[0] + "_TrackNet.mp4"
+
+trajectory_path = args.trajectory_path
+if trajectory_path == "":
+    # Ball positions next to the output video
+    trajectory_path = output_video_path.rsplit('.', 1)[0] + ".traj"
+
+# Split the video into one frame range per process
+video = cv2.VideoCapture(input_video_path)
+frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+video.release()
+
+n_chunks = max(1, min(args.processes, frame_count // args.min_chunk_frames))
+bounds = [frame_count * i // n_chunks for i in range(0, n_chunks + 1)]
+# The frame count in the header can be off, the last chunk reads until the video ends
+bounds[-1] = -1
+
+# Share the cores between the processes
+threads = str(max(1, (os.cpu_count() or 1) // n_chunks))
+env = dict(os.environ, OMP_NUM_THREADS=threads, TF_NUM_INTRAOP_THREADS=threads, TF_NUM_INTEROP_THREADS="1")
+
+script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predict_video.py")
+work_dir = tempfile.mkdtemp(prefix="tracknet_chunks_")
+chunks = []
+try:
+    # Every chunk runs in its own process with its own model. predict_video.py reads the
+    # two frames before its start to seed the first triplet, but only writes its own range
+    for i in range(0, n_chunks):
+        chunk_video = os.path.join(work_dir, "chunk_%03d.mp4" % i)
+        chunk_positions = os.path.join(work_dir, "chunk_%03d.traj" % i)
+        command = [sys.executable, script, "--input_video_path", input_video_path,
+                   "--output_video_path", chunk_video, "--trajectory_path", chunk_positions,
+                   "--start_frame", str(bounds[i]), "--end_frame", str(bounds[i + 1]), "--codec", args.codec] + predict_args
+        log = open(os.path.join(work_dir, "chunk_%03d.log" % i), "w")
+        chunks.append((subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT), log, chunk_video, chunk_positions))
+
+    failed = []
+    for i, (process, log, chunk_video, chunk_positions) in enumerate(chunks):
+        if process.wait() != 0:
+            failed.append(i)
+        log.close()
+    if failed:
+        for i in failed:
+            with open(os.path.join(work_dir, "chunk_%03d.log" % i)) as log:
+                print(log.read())
+        raise RuntimeError("chunks %s failed, see the logs above" % failed)
+
+    # Stitch the position tables in frame order
+    with TrajectoryWriter(trajectory_path) as sink:
+        for process, log, chunk_video, chunk_positions in chunks:
+            sink.append(readTables(chunk_positions))
+    if args.positions_path != "":
+        exportCsv(readTrajectory(trajectory_path), args.positions_path)
+
+    # Stitch the annotated segments, without re-encoding when ffmpeg is available
+    if args.codec == "none":
+        pass
+    elif shutil.which("ffmpeg") is not None:
+        concat_list = os.path.join(work_dir, "segments.txt")
+        with open(concat_list, "w") as file:
+            for process, log, chunk_video, chunk_positions in chunks:
+                file.write("file '%s'\n" % chunk_video)
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", concat_list,
+                        "-c", "copy", "-movflags", "+faststart", output_video_path], check=True)
+    else:
+        # The segments are already scaled and at the output frame rate
+        segment = cv2.VideoCapture(chunks[0][2])
+        output_video = VideoEncoder(output_video_path, segment.get(cv2.CAP_PROP_FPS),
+                                    int(segment.get(cv2.CAP_PROP_FRAME_WIDTH)), int(segment.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                                    args.codec)
+        segment.release()
+        for process, log, chunk_video, chunk_positions in chunks:
+            segment = cv2.VideoCapture(chunk_video)
+            while True:
+                ret, frame = segment.read()
+                if not ret:
+                    break
+                output_video.write(frame)
+            segment.release()
+        output_video.release()
+finally:
+    for process, log, chunk_video, chunk_positions in chunks:
+        if process.poll() is None:
+            process.kill()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+print("Finish")
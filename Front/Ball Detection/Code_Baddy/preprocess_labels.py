@@ -0,0 +1,16 @@
+# python preprocess_labels.py --training_images_name="training.csv" --labels_path=cache/training.labels.npy --output_height=360 --output_width=640
+import argparse
+import LoadBatches
+
+#parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--training_images_name", type = str  )
+parser.add_argument("--labels_path", type = str  )
+parser.add_argument("--output_height", type=int , default = 360  )
+parser.add_argument("--output_width", type=int , default = 640 )
+
+args = parser.parse_args()
+
+#convert every annotation image of the csv file into the label store
+labels = LoadBatches.buildLabelStore( args.training_images_name , args.labels_path , args.output_width , args.output_height )
+print("Wrote", labels.shape[0], "labels to", args.labels_path)
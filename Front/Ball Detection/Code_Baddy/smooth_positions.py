@@ -0,0 +1,46 @@
+# python smooth_positions.py --input_path=ball_positions.csv --output_path=ball_positions_smooth.csv --max_gap=10
+import argparse
+import csv
+from TrajectorySmoother import TrajectorySmoother, FLAG_NAMES, INTERPOLATED, CSV_HEADER, csvRows
+
+# Parse parameters
+parser = argparse.ArgumentParser()
+parser.add_argument("--input_path", type=str, default="ball_positions.csv")
+parser.add_argument("--output_path", type=str)
+parser.add_argument("--max_speed", type=float, default=60.0)
+parser.add_argument("--max_gap", type=int, default=10)
+parser.add_argument("--smooth_alpha", type=float, default=0.7)
+parser.add_argument("--smooth_beta", type=float, default=0.3)
+
+args = parser.parse_args()
+smoother = TrajectorySmoother(args.max_speed, args.max_gap, args.smooth_alpha, args.smooth_beta)
+
+with open(args.input_path, newline='') as input_file, open(args.output_path, mode='w', newline='') as output_file:
+    reader = csv.DictReader(input_file)
+    writer = csv.writer(output_file)
+    writer.writerow(CSV_HEADER)
+
+    # Only raw detections are smoothed again, tables from older runs have no confidence or flag.
+    # Older runs also appended to the same table, the last row of a frame wins and rows are sorted
+    rows = {}
+    for row in reader:
+        if row.get('Flag') == FLAG_NAMES[INTERPOLATED] or row['X_Position'] == '':
+            continue
+        rows[int(row['Frame'])] = row
+
+    previous = None
+    for index in sorted(rows):
+        row = rows[index]
+
+        # Frames missing from the table had no detection
+        if previous is not None:
+            for missing in range(previous + 1, index):
+                writer.writerows(csvRows(smoother.push(missing, None)))
+        previous = index
+
+        position = (float(row['X_Position']), float(row['Y_Position']), float(row.get('Confidence') or 1.0))
+        writer.writerows(csvRows(smoother.push(index, position)))
+
+    writer.writerows(csvRows(smoother.flush()))
+
+print("Finish")
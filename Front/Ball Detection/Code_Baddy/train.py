@@ -1,25 +1,39 @@
 # python train.py --save_weights_path=weights/model --training_images_name="training.csv" --epochs=500 --n_classes=256 --input_height=360 --input_width=640 --load_weights=2 --step_per_epochs=200 --batch_size=2
 # python train.py --save_weights_path=weights/model --training_images_name="training_100.csv" --epochs=50 --n_classes=256 --input_height=360 --input_width=640 --load_weights=2 --step_per_epochs=5 --batch_size=1
 # python train.py --save_weights_path=weights/model --training_images_name="training_100.csv" --epochs=50 --n_classes=256 --input_height=180 --input_width=320 --load_weights=-1 --step_per_epochs=5 --batch_size=1
+# python train.py --save_weights_path=weights/model --training_images_name="training.csv" --epochs=500 --n_classes=256 --input_height=360 --input_width=640 --load_weights=-1 --step_per_epochs=200 --batch_size=2 --cache_path=cache/training --workers=4 --labels_path=cache/training.labels.npy
+# python train.py --save_weights_path=weights/model --training_images_name="training.csv" --epochs=500 --n_classes=256 --input_height=360 --input_width=640 --load_weights=-1 --step_per_epochs=200 --batch_size=16 --cache_path=cache/training --workers=4 --labels_path=cache/training.labels.npy --sparse_labels --compact_inputs --precision=mixed_bfloat16
+# Needs TensorFlow 2.4 ~ 2.15 (Keras 2): the model is built with keras.backend.int_shape and
+# the mixed precision policies came in 2.4, Keras 3 (TensorFlow 2.16 and later) has neither
 import argparse
 import Models , LoadBatches
 from keras import optimizers
 from keras.utils import plot_model
-from Models.TrackNet import TrackNet
+from Models.TrackNet import TRACKNET_VARIANTS, TrackNetVariant
 
 #parse parameters
 parser = argparse.ArgumentParser()
 parser.add_argument("--save_weights_path", type = str  )
 parser.add_argument("--training_images_name", type = str  )
-parser.add_argument("--n_classes", type=int )
+parser.add_argument("--n_classes", type=int , default = None )
+parser.add_argument("--variant", type=str , default = "full" , choices = sorted(TRACKNET_VARIANTS) )
 parser.add_argument("--input_height", type=int , default = 360  )
 parser.add_argument("--input_width", type=int , default = 640 )
 parser.add_argument("--epochs", type = int, default = 1000 )
 parser.add_argument("--batch_size", type = int, default = 2 )
 parser.add_argument("--load_weights", type = str , default = "-1")
 parser.add_argument("--step_per_epochs", type = int, default = 200 )
+parser.add_argument("--cache_path", type = str , default = "")
+parser.add_argument("--workers", type = int, default = 2 )
+parser.add_argument("--labels_path", type = str , default = "")
+parser.add_argument("--sparse_labels", action = "store_true" )
+parser.add_argument("--compact_inputs", action = "store_true" )
+parser.add_argument("--precision", type = str , default = "float32" , choices = ["float32", "mixed_float16", "mixed_bfloat16"] )
 
 args = parser.parse_args()
+#only the frame cache keeps the frames as uint8, the plain generator decodes to float32
+if args.compact_inputs and args.cache_path == "":
+	parser.error( "--compact_inputs needs --cache_path" )
 training_images_name = args.training_images_name
 train_batch_size = args.batch_size
 n_classes = args.n_classes
@@ -29,12 +43,27 @@ save_weights_path = args.save_weights_path
 epochs = args.epochs
 load_weights = args.load_weights
 step_per_epochs = args.step_per_epochs
-optimizer_name = optimizers.Adadelta(lr=1.0)
+cache_path = args.cache_path
+workers = args.workers
+labels_path = args.labels_path
+sparse_labels = args.sparse_labels
+compact_inputs = args.compact_inputs
+precision = args.precision
+optimizer_name = optimizers.Adadelta(learning_rate=1.0)
 
-#load TrackNet model
-modelTN = Models.TrackNet.TrackNet
-m = modelTN( n_classes , input_height=input_height, input_width=input_width   )
-m.compile(loss='categorical_crossentropy', optimizer= optimizer_name, metrics=['accuracy'])
+#compute in 16 bit floats while keeping float32 weights, must be set before the model is built
+if precision != "float32":
+	from keras import mixed_precision
+	mixed_precision.set_global_policy( precision )
+
+#load TrackNet model, n_classes defaults to the number of classes of the variant
+m = TrackNetVariant( args.variant , input_height , input_width , n_classes )
+n_classes = m.output_shape[-1]
+
+#with sparse labels each pixel is labelled by its class index ( uint8 ) instead of
+#a n_classes one-hot vector, so a label takes 1 byte per pixel instead of n_classes floats
+loss_name = 'sparse_categorical_crossentropy' if sparse_labels else 'categorical_crossentropy'
+m.compile(loss=loss_name, optimizer= optimizer_name, metrics=['accuracy'])
 
 #check if need to retrain the model weights
 if load_weights != "-1":
@@ -48,12 +77,18 @@ model_output_height = m.outputHeight
 model_output_width = m.outputWidth
 
 #creat input data and output data
-Generator  = LoadBatches.InputOutputGenerator( training_images_name,  train_batch_size,  n_classes , input_height , input_width , model_output_height , model_output_width)
+if cache_path != "":
+	#frames are decoded once into the cache, batches are prefetched by background threads
+	Generator  = LoadBatches.CachedInputOutputGenerator( training_images_name,  train_batch_size,  n_classes , input_height , input_width , model_output_height , model_output_width , cache_path , sparse_labels=sparse_labels , workers=workers , labels_path=labels_path , compact_inputs=compact_inputs )
+	use_multiprocessing = False
+else:
+	Generator  = LoadBatches.InputOutputGenerator( training_images_name,  train_batch_size,  n_classes , input_height , input_width , model_output_height , model_output_width , labels_path=labels_path , sparse_labels=sparse_labels )
+	use_multiprocessing = True
 
 
 #start to train the model, and save weights until finish 
 '''
-m.fit_generator( Generator, step_per_epochs, epochs )
+m.fit( Generator, steps_per_epoch=step_per_epochs, epochs=epochs )
 m.save_weights( save_weights_path + ".0" )
 
 '''
@@ -62,6 +97,6 @@ m.save_weights( save_weights_path + ".0" )
 
 for ep in range(1, epochs+1 ):
 	print("Epoch :", str(ep) + "/" + str(epochs))
-	m.fit_generator(Generator, step_per_epochs, use_multiprocessing=True)
+	m.fit(Generator, steps_per_epoch=step_per_epochs, use_multiprocessing=use_multiprocessing)
 	if ep % 2 == 0:
 		m.save_weights(save_weights_path + ".0")
@@ -46,6 +46,11 @@ export interface MatchResponse {
   analysis_data?: any;
 }
 
+export interface MatchHistoryPage {
+  items: MatchResponse[];
+  next_cursor: string | null;
+}
+
 export interface UploadResponse {
   upload_url: string;
   video_id: string;
@@ -132,8 +137,12 @@ class ApiClient {
     });
   }
 
-  async getMatchHistory(token: string): Promise<MatchResponse[]> {
-    return this.request<MatchResponse[]>('/analysis/match_history', {
+  async getMatchHistory(token: string, cursor?: string, limit?: number): Promise<MatchHistoryPage> {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    if (limit) params.set('limit', String(limit));
+    const query = params.toString();
+    return this.request<MatchHistoryPage>(`/analysis/match_history${query ? `?${query}` : ''}`, {
       headers: {
         'Authorization': `Bearer ${token}`,
       },
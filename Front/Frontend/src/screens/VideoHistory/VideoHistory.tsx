@@ -31,35 +31,37 @@ export const VideoHistory = (): JSX.Element => {
   const [videos, setVideos] = useState<MatchVideo[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { token } = useAuth();
 
+  // Transform API response to match our interface
+  const toMatchVideo = (match: MatchResponse, index: number): MatchVideo => ({
+    id: match.id,
+    title: match.title || `Match ${index + 1}`,
+    opponent: "Opponent", // This would come from the backend
+    date: match.created_at,
+    duration: "1:30:00", // This would come from the backend
+    thumbnail: "https://images.pexels.com/photos/209977/pexels-photo-209977.jpeg?auto=compress&cs=tinysrgb&w=400",
+    status: match.status as "processed" | "processing" | "failed",
+    result: "win" as const, // This would come from the backend
+    score: "6-4, 6-2", // This would come from the backend
+    analytics: {
+      shotSpeed: 95,
+      accuracy: 87,
+      rallies: 142,
+    },
+  });
+
   useEffect(() => {
     const fetchMatchHistory = async () => {
       if (!token) return;
       
       try {
         setLoading(true);
-        const matchHistory = await apiClient.getMatchHistory(token);
-        
-        // Transform API response to match our interface
-        const transformedVideos: MatchVideo[] = matchHistory.map((match, index) => ({
-          id: match.id,
-          title: match.title || `Match ${index + 1}`,
-          opponent: "Opponent", // This would come from the backend
-          date: match.created_at,
-          duration: "1:30:00", // This would come from the backend
-          thumbnail: "https://images.pexels.com/photos/209977/pexels-photo-209977.jpeg?auto=compress&cs=tinysrgb&w=400",
-          status: match.status as "processed" | "processing" | "failed",
-          result: "win" as const, // This would come from the backend
-          score: "6-4, 6-2", // This would come from the backend
-          analytics: {
-            shotSpeed: 95,
-            accuracy: 87,
-            rallies: 142,
-          },
-        }));
-        
-        setVideos(transformedVideos);
+        const page = await apiClient.getMatchHistory(token);
+        setVideos(page.items.map(toMatchVideo));
+        setNextCursor(page.next_cursor);
       } catch (err) {
         setError("Failed to load match history");
         console.error("Error fetching match history:", err);
@@ -71,6 +73,25 @@ export const VideoHistory = (): JSX.Element => {
     fetchMatchHistory();
   }, [token]);
 
+  const loadMore = async () => {
+    if (!token || !nextCursor) return;
+
+    try {
+      setLoadingMore(true);
+      const page = await apiClient.getMatchHistory(token, nextCursor);
+      setVideos(previous => [
+        ...previous,
+        ...page.items.map((match, index) => toMatchVideo(match, previous.length + index)),
+      ]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError("Failed to load match history");
+      console.error("Error fetching match history:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredVideos = videos.filter(video => {
     const matchesSearch = video.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
                          video.opponent.toLowerCase().includes(searchTerm.toLowerCase());
@@ -250,6 +271,14 @@ export const VideoHistory = (): JSX.Element => {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
+
       {filteredVideos.length === 0 && (
         <Card>
           <CardContent className="py-12 text-center">